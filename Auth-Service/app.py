@@ -3,6 +3,7 @@ from flask import Flask, render_template, request, flash, session, redirect, url
 import sqlite3
 import requests
 from config import *
+from http_client import service_client
 from flask_cors import CORS
 
 app = Flask(__name__)
@@ -129,12 +130,7 @@ def login():
                 
                 try:
                     # Call doctors service API using internal URL
-                    response = requests.post(
-                        CLINIQUE_API_URL, 
-                        json=api_payload, 
-                        timeout=5,
-                        proxies={'http': None, 'https': None}
-                    )
+                    response = service_client.post(CLINIQUE_API_URL, json=api_payload)
                     response.raise_for_status()
                     
                     # Insert into local database
@@ -333,7 +329,7 @@ def reset_password():
 def rdv_stats():
     """Proxy pour les statistiques RDV"""
     try:
-        response = requests.get(f"{RDV_URL}/api/stats", timeout=5)
+        response = service_client.get(f"{RDV_URL}/api/stats")
         response.raise_for_status()
         return jsonify(response.json())
     except Exception as e:
@@ -349,7 +345,7 @@ def rdv_stats():
 def rdv_stats_historique():
     """Proxy pour l'historique des revenus"""
     try:
-        response = requests.get(f"{RDV_URL}/api/stats/historique", timeout=5)
+        response = service_client.get(f"{RDV_URL}/api/stats/historique")
         response.raise_for_status()
         return jsonify(response.json())
     except Exception as e:
@@ -378,7 +374,7 @@ def server_error(e):
 def rdv_today():
     """Proxy pour les rendez-vous du jour"""
     try:
-        response = requests.get(f"{RDV_URL}/api/rdv_today", timeout=5)
+        response = service_client.get(f"{RDV_URL}/api/rdv_today")
         response.raise_for_status()
         return jsonify(response.json())
     except Exception as e:
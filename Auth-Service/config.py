@@ -1,4 +1,11 @@
 import os
+import sys
+
+# Client HTTP commun (shared/http_client.py) : copié dans /opt/shared par les
+# images Docker (PYTHONPATH), pris directement dans le dépôt en local
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared')
+if os.path.isdir(SHARED_DIR) and SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
 
 # ===================================================
 # Configuration partagée pour tous les microservices
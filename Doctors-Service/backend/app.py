@@ -1,23 +1,44 @@
 import os
 import json
+import time
 import requests
-import re
+from concurrent.futures import ThreadPoolExecutor, wait
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, date
 from config import AUTH_URL, PATIENTS_URL, DOCTORS_URL, RDV_URL
 from data_structures import (
     get_doctor_data,
+    get_doctors_by_speciality,
+    get_doctors_by_status,
     delete_doctor_by_id,
     get_doctor_by_id,
     add_or_update_doctor,
-    get_appointment_data
+    get_appointment_data,
+    get_data,
+    invalidate_dashboard
 )
+from patient_resolver import PatientNameResolver
+from doctor_index import DoctorNameIndex
+from http_client import service_client
+from upstream_cache import cached_get_json, upstream_cache
 
 app = Flask(__name__)
 # IMPORTANT: Configure CORS properly
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+# Cache nom → id patient partagé entre les requêtes (TTL + LRU)
+patient_resolver = PatientNameResolver(PATIENTS_URL)
+
+# Appels parallèles de /api/patient/<id> : échéance globale en secondes
+PATIENT_DETAIL_DEADLINE = float(os.getenv('PATIENT_DETAIL_DEADLINE', 4))
+fanout_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='fanout')
+# Projection demandée à Patient-Service : uniquement ce que la fiche affiche
+PATIENT_DETAIL_PARAMS = {"fields": "id,nom,prenom,nom_complet", "include": "ordonnances"}
+
+# Durée de fraîcheur (secondes) des données d'agenda venant des autres services
+AGENDA_CACHE_TTL = float(os.getenv('AGENDA_CACHE_TTL', 15))
+
 def fetch_appointments_from_friend_api(doctor_id=None, date_str=None):
     params = {}
     if doctor_id:
@@ -26,7 +47,7 @@ def fetch_appointments_from_friend_api(doctor_id=None, date_str=None):
         params['date'] = date_str
 
     try:
-        response = requests.get(f"{RDV_URL}/api/appointments", params=params, timeout=5)
+        response = service_client.get(f"{RDV_URL}/api/appointments", params=params)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -36,7 +57,17 @@ def fetch_appointments_from_friend_api(doctor_id=None, date_str=None):
 @app.route('/api/doctors', methods=['GET'])
 def api_doctors():
     try:
-        doctors_data = get_doctor_data()
+        # Filtres optionnels ?speciality= et ?status=, servis par les index du dépôt
+        speciality = request.args.get('speciality')
+        status = request.args.get('status')
+        if speciality:
+            doctors_data = get_doctors_by_speciality(speciality)
+            if status:
+                doctors_data = [d for d in doctors_data if d.get('status') == status]
+        elif status:
+            doctors_data = get_doctors_by_status(status)
+        else:
+            doctors_data = get_doctor_data()
         result = []
         for d in doctors_data:
             result.append({
@@ -85,6 +116,7 @@ def api_add_doctor():
         print(f"Data to save: {data_to_save}")  # Debug
 
         if add_or_update_doctor(data_to_save):
+            upstream_cache.invalidate(f"{DOCTORS_URL}/api/doctors")
             return jsonify({
                 "message": "Doctor added successfully", 
                 "doctor": data_to_save
@@ -105,6 +137,7 @@ def api_update_doctor(doctor_id):
         print(f"Updating doctor {doctor_id} with data: {data}")  # Debug
         
         if add_or_update_doctor(data):
+            upstream_cache.invalidate(f"{DOCTORS_URL}/api/doctors")
             return jsonify({"message": "Doctor updated successfully"}), 200
         else:
             return jsonify({"error": "Failed to update doctor"}), 500
@@ -117,6 +150,7 @@ def api_update_doctor(doctor_id):
 def api_delete_doctor(doctor_id):
     try:
         if delete_doctor_by_id(doctor_id):
+            upstream_cache.invalidate(f"{DOCTORS_URL}/api/doctors")
             return jsonify({"message": f"Médecin {doctor_id} supprimé."}), 200
         else:
             return jsonify({"error": "Erreur: Médecin non trouvé"}), 404
@@ -124,68 +158,54 @@ def api_delete_doctor(doctor_id):
         print(f"Error in api_delete_doctor: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/dashboard', methods=['GET'])
+def api_dashboard():
+    try:
+        if request.args.get('refresh') == 'true':
+            invalidate_dashboard()
+        return jsonify(get_data()), 200
+    except Exception as e:
+        print(f"Error in api_dashboard: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/appointments', methods=['GET'])
 def api_appointments():
     try:
-        raw_appointments = []
-        doctors = []
-
-        try:
-            rdv_response = requests.get(f"{RDV_URL}/api/rdv_today", timeout=4)
-            if rdv_response.status_code == 200:
-                raw_appointments = rdv_response.json()
-        except Exception as e:
-            print("Hajer HS → on passe au mock", e)
-
-        if not raw_appointments:
+        # Copies en cache (stale-while-revalidate) ; les mocks ne servent que
+        # si RDV-Service n'a jamais répondu pour la journée
+        raw_appointments = cached_get_json(
+            f"{RDV_URL}/api/rdv/today", ttl=AGENDA_CACHE_TTL,
+            scope=date.today().isoformat(), timeout=(2, 4)
+        )
+        if raw_appointments is None:
+            print("Hajer HS → on passe au mock")
             raw_appointments = get_appointment_data()
 
-        try:
-            doctors = requests.get(f"{DOCTORS_URL}/api/doctors", timeout=3).json()
-        except:
+        doctors = cached_get_json(f"{DOCTORS_URL}/api/doctors", ttl=AGENDA_CACHE_TTL, timeout=(2, 3))
+        if doctors is None:
             doctors = get_doctor_data()
 
-        def find_doctor_name(doc_id):
-            def clean_name(name):
-                if not name:
-                    return ""
-                name = str(name).strip()
-                name = re.sub(r'^(dr\.?\s*)+', '', name, flags=re.IGNORECASE)
-                return name.strip()
+        doctor_names = DoctorNameIndex(doctors)
 
-            if not doc_id:
-                return "ID Manquant"
+        def extract_patient_id(ap):
+            return (ap.get('patient_id') or
+                    ap.get('id_patient') or
+                    ap.get('idPatient') or
+                    ap.get('patientId') or
+                    None)
 
-            for d in doctors:
-                if str(d.get('id')) == str(doc_id) or str(d.get('id_medecin')) == str(doc_id):
-                    nom_complet = d.get('name') or d.get('nom_complet')
-                    nom_propre = clean_name(nom_complet)
-                    if nom_propre:
-                        return f"Dr. {nom_propre}"
-                    return f"Dr. {doc_id} (Nom Vide)"
-
-            nom_base = clean_name(doc_id)
-            return f" {nom_base}" if nom_base else f"Dr. {doc_id}"
+        # Un seul appel groupé vers Patient-Service pour tous les noms sans id
+        unresolved_names = [
+            ap.get('patient') for ap in raw_appointments
+            if not extract_patient_id(ap) and ap.get('patient')
+        ]
+        resolved_ids = patient_resolver.resolve_many(unresolved_names) if unresolved_names else {}
 
         normalized = []
         for ap in raw_appointments:
-            patient_id = (ap.get('patient_id') or
-                          ap.get('id_patient') or
-                          ap.get('idPatient') or
-                          ap.get('patientId') or
-                          None)
-
+            patient_id = extract_patient_id(ap)
             if not patient_id and ap.get('patient'):
-                patient_name = ap.get('patient') or ap.get('nom_patient') or ""
-                try:
-                    resp = requests.get(f"{PATIENTS_URL}/api/patients", timeout=3).json()
-                    for p in resp:
-                        full_name = f"{p.get('prenom','')} {p.get('nom','')}".strip()
-                        if full_name.lower() == patient_name.lower() or patient_name.lower() in full_name.lower():
-                            patient_id = p.get('id')
-                            break
-                except:
-                    pass
+                patient_id = resolved_ids.get(ap.get('patient'))
 
             doctor_id = (ap.get('medecin') or ap.get('doctor_id') or ap.get('id_medecin') or ap.get('doctorId') or ap.get('id_doctor'))
             
@@ -193,7 +213,7 @@ def api_appointments():
                 "time": ap.get('heure') or ap.get('time') or "??:??",
                 "patient": ap.get('patient') or ap.get('nom_patient') or "Patient inconnu",
                 "patient_id": patient_id or "INCONNU",
-                "doctor_name": find_doctor_name(doctor_id),
+                "doctor_name": doctor_names.display_name(doctor_id),
                 "reason": ap.get('motif') or ap.get('reason') or "-",
                 "status": ap.get('statut') or ap.get('status') or "EN ATTENTE",
             })
@@ -203,40 +223,60 @@ def api_appointments():
         print(f"Error in api_appointments: {e}")
         return jsonify({"error": str(e)}), 500
 
+def _timed_fetch(url, params=None):
+    """Appel GET chronométré ; retourne (statut, données, durée en ms)."""
+    start = time.perf_counter()
+    try:
+        response = service_client.get(url, params=params, timeout=(2, PATIENT_DETAIL_DEADLINE))
+        response.raise_for_status()
+        status, data = 'ok', response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        app.logger.error(f"Erreur d'accès à {url}: {e}")
+        status, data = 'error', None
+    return status, data, (time.perf_counter() - start) * 1000
+
 @app.route('/api/patient/<patient_id>', methods=['GET'])
 def api_patient_detail(patient_id):
     try:
-        patient_data = {"patient": f"Patient ID {patient_id} Inconnu", "id": patient_id}
-        try:
-            response = requests.get(f"{PATIENTS_URL}/api/patient/{patient_id}")
-            response.raise_for_status()
-            patient_data = response.json()
-        except requests.exceptions.RequestException as e:
-            app.logger.error(f"Erreur d'accès au microservice Patient: {e}")
-
-        rdv_data = []
-        try:
-            response = requests.get(f"{RDV_URL}/api/appointments?patient_id={patient_id}")
-            response.raise_for_status()
-            rdv_data = response.json()
-        except requests.exceptions.RequestException:
-            pass
-
-        ord_data = []
-        try:
-            response = requests.get(f"{PATIENTS_URL}/api/ordonnances/{patient_id}")
-            response.raise_for_status()
-            ord_data = response.json()
-        except requests.exceptions.RequestException:
-            pass
-
-        last_rdv = rdv_data[-1] if rdv_data else {}
-
-        return jsonify({
+        # Patient-Service et RDV-Service sont interrogés en parallèle, avec une échéance globale
+        # Patient-Service ne renvoie que les champs affichés et les ordonnances
+        legs = {
+            "patient": (f"{PATIENTS_URL}/api/patients/{patient_id}", PATIENT_DETAIL_PARAMS),
+            "rdv": (f"{RDV_URL}/api/rdv/patient/{patient_id}/last", None),
+        }
+        start = time.perf_counter()
+        futures = {name: fanout_pool.submit(_timed_fetch, url, params) for name, (url, params) in legs.items()}
+        wait(futures.values(), timeout=PATIENT_DETAIL_DEADLINE)
+
+        results, sources, timings = {}, {}, []
+        for name, future in futures.items():
+            if future.done():
+                status, data, duration = future.result()
+            else:
+                future.cancel()
+                status, data, duration = 'timeout', None, (time.perf_counter() - start) * 1000
+            results[name] = data
+            sources[name] = status
+            timings.append(f'{name};dur={duration:.1f};desc="{status}"')
+
+        sources["ordonnances"] = sources["patient"]
+        patient_data = results["patient"] or {"patient": f"Patient ID {patient_id} Inconnu", "id": patient_id}
+        ord_data = patient_data.pop("ordonnances", None) or []
+
+        # RDV-Service renvoie le dernier RDV, ou {"last_rdv": null} s'il n'y en a pas
+        last_rdv = results["rdv"] or {}
+        if "last_rdv" in last_rdv:
+            last_rdv = last_rdv["last_rdv"] or {}
+
+        response = jsonify({
             "patient": patient_data,
             "last_rdv": last_rdv,
-            "ordonnances": ord_data
-        }), 200
+            "ordonnances": ord_data,
+            "sources": sources,
+            "partial": any(status != 'ok' for status in sources.values())
+        })
+        response.headers['Server-Timing'] = ", ".join(timings)
+        return response, 200
     except Exception as e:
         print(f"Error in api_patient_detail: {e}")
         return jsonify({"error": str(e)}), 500
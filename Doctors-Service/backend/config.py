@@ -1,4 +1,11 @@
 import os
+import sys
+
+# Client HTTP commun (shared/http_client.py) : copié dans /opt/shared par les
+# images Docker (PYTHONPATH), pris directement dans le dépôt en local
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared')
+if os.path.isdir(SHARED_DIR) and SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
 
 # ===================================================
 # Configuration partagée pour le microservice Doctors
@@ -41,4 +48,16 @@ print(f"📍 Configuration chargée:")
 print(f"   - AUTH_URL: {AUTH_URL}")
 print(f"   - PATIENTS_URL: {PATIENTS_URL}")
 print(f"   - DOCTORS_URL: {DOCTORS_URL}")
-print(f"   - RDV_URL: {RDV_URL}")
\ No newline at end of file
+print(f"   - RDV_URL: {RDV_URL}")
+
+# Mode journal (write-ahead) pour doctors_data.json / appointments_data.json :
+# les écritures sont ajoutées à un fichier .journal et compactées périodiquement
+DATA_JOURNAL = os.getenv('DATA_JOURNAL', 'false').lower() == 'true'
+JOURNAL_COMPACT_EVERY = int(os.getenv('JOURNAL_COMPACT_EVERY', 200))
+
+# Backend de stockage des médecins / rendez-vous : 'json' (fichiers) ou 'sqlite'
+DOCTORS_STORAGE = os.getenv('DOCTORS_STORAGE', 'json').lower()
+DOCTORS_DATABASE_URI = os.getenv('DOCTORS_DATABASE_URI', 'sqlite:///data/doctors.db')
+
+# Durée de cache (secondes) des indicateurs du tableau de bord
+DASHBOARD_CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', 30))
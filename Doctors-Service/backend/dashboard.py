@@ -0,0 +1,125 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from http_client import service_client
+
+MONTHS = ["Jan", "Fév", "Mar", "Avr", "Mai", "Juin", "Juil", "Août", "Sep", "Oct", "Nov", "Déc"]
+
+
+class _Flight:
+    """Calcul en cours : les lectures concurrentes attendent son résultat."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class DashboardAggregator:
+    """Indicateurs du tableau de bord calculés à partir des services réels.
+
+    Les trois sources (Patient-Service, RDV-Service stats, RDV du jour) sont
+    interrogées en parallèle ; le résultat composite est mis en cache `ttl`
+    secondes et peut être invalidé explicitement après une écriture.
+    Un seul calcul à la fois, hors verrou : une invalidation n'attend jamais
+    les services amont.
+    """
+
+    def __init__(self, patients_url, rdv_url, doctor_count, ttl=30, timeout=(2, 4)):
+        self.patients_url = patients_url
+        self.rdv_url = rdv_url
+        self.doctor_count = doctor_count
+        self.ttl = ttl
+        self.timeout = timeout
+        self._cached = None
+        self._computed_at = 0.0
+        self._generation = 0
+        self._flight = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='dashboard')
+
+    def _get_json(self, url):
+        response = service_client.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _patients_total(self):
+        return self._get_json(f"{self.patients_url}/api/patients/count")['count']
+
+    def _revenue(self):
+        return self._get_json(f"{self.rdv_url}/api/stats")
+
+    def _rdv_today(self):
+        return len(self._get_json(f"{self.rdv_url}/api/rdv/today"))
+
+    def _compute(self):
+        futures = {
+            'patients': self._executor.submit(self._patients_total),
+            'revenue': self._executor.submit(self._revenue),
+            'rdv_today': self._executor.submit(self._rdv_today),
+        }
+        results, sources = {}, {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+                sources[name] = 'ok'
+            except (requests.exceptions.RequestException, KeyError, TypeError, ValueError) as e:
+                print(f"Tableau de bord : source {name} indisponible ({e})")
+                results[name] = None
+                sources[name] = 'error'
+
+        stats = results['revenue'] or {}
+        monthly = stats.get('revenus_mensuels')
+        if not isinstance(monthly, list) or len(monthly) != 12:
+            # Pas de série plutôt que douze mois à zéro
+            if sources['revenue'] == 'ok':
+                print("Tableau de bord : source revenue sans revenus mensuels valides")
+            sources['revenue'] = 'error'
+            monthly = None
+        return {
+            "global_indicators": [
+                {"label": "Patients Total", "value": results['patients'], "icon": "users"},
+                {"label": "Médecins", "value": self.doctor_count(), "icon": "user-check"},
+                {"label": "RDV Aujourd'hui", "value": results['rdv_today'], "icon": "calendar"}
+            ],
+            "monthly_revenue": [
+                {"month": month, "revenue": revenue} for month, revenue in zip(MONTHS, monthly)
+            ] if monthly is not None else None,
+            "annee": stats.get('annee_courante'),
+            "sources": sources
+        }
+
+    def get(self):
+        with self._lock:
+            if self._cached is not None and time.monotonic() - self._computed_at < self.ttl:
+                return self._cached
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = _Flight()
+                generation = self._generation
+
+        if not leader:
+            flight.done.wait()
+            return flight.result if flight.result is not None else self._compute()
+
+        try:
+            flight.result = self._compute()
+            with self._lock:
+                # Invalidé pendant le calcul : résultat rendu mais pas mis en cache
+                if generation == self._generation:
+                    self._cached = flight.result
+                    self._computed_at = time.monotonic()
+            return flight.result
+        finally:
+            with self._lock:
+                if self._flight is flight:
+                    self._flight = None
+            flight.done.set()
+
+    def invalidate(self):
+        with self._lock:
+            self._cached = None
+            self._generation += 1
+            # Les lectures suivantes ne rejoignent pas un calcul commencé avant
+            self._flight = None
@@ -1,93 +1,99 @@
 import json
 import os
+from config import (
+    DATA_JOURNAL, JOURNAL_COMPACT_EVERY, DOCTORS_STORAGE, DOCTORS_DATABASE_URI,
+    DASHBOARD_CACHE_TTL, PATIENTS_URL, RDV_URL
+)
+from dashboard import DashboardAggregator
+from doctor_store import DoctorStore, FileLock
+from journal import JsonJournal, write_snapshot
 
 # Fichier pour stocker les données des médecins
 DOCTORS_FILE = 'doctors_data.json'
 APPOINTMENTS_FILE = 'appointments_data.json'
 
+# Backend SQL optionnel (DOCTORS_STORAGE=sqlite), sinon fichiers JSON
+_sql_storage = None
+if DOCTORS_STORAGE == 'sqlite':
+    from sql_store import SqlStorage
+    _sql_storage = SqlStorage(DOCTORS_DATABASE_URI)
+    _doctor_store = _sql_storage.doctors
+else:
+    # Dépôt en mémoire, partagé par toutes les requêtes du processus
+    _doctor_store = DoctorStore(
+        DOCTORS_FILE,
+        journal=JsonJournal(DOCTORS_FILE, compact_every=JOURNAL_COMPACT_EVERY) if DATA_JOURNAL else None
+    )
+
+_appointments_lock = FileLock(APPOINTMENTS_FILE)
+_appointments_journal = (
+    JsonJournal(APPOINTMENTS_FILE, key=None, compact_every=JOURNAL_COMPACT_EVERY) if DATA_JOURNAL else None
+)
+
 # --- Fonctions pour les Médecins ---
 
 def load_doctors():
-    """Charge les données des médecins depuis le fichier JSON."""
-    if os.path.exists(DOCTORS_FILE):
-        try:
-            with open(DOCTORS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Erreur lors du chargement des médecins: {e}")
-            return []
-    return []
+    """Charge les données des médecins (relues seulement si le fichier a changé)."""
+    return _doctor_store.all()
 
 def save_doctors(doctors):
     """Sauvegarde les données des médecins dans le fichier JSON."""
     try:
-        with open(DOCTORS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(doctors, f, ensure_ascii=False, indent=2)
+        _doctor_store.replace_all(doctors)
         return True
     except Exception as e:
         print(f"Erreur lors de la sauvegarde des médecins: {e}")
         return False
 
+def _ensure_default_doctors():
+    """Initialise le fichier avec les médecins par défaut s'il est vide."""
+    if _doctor_store.count():
+        return
+    # Données par défaut si le fichier est vide
+    save_doctors([
+        {
+            "id": 1,
+            "name": "Benali",
+            "speciality": "Médecine Générale",
+            "status": "Disponible",
+            "patients": 45
+        },
+        {
+            "id": 2,
+            "name": "Meziane",
+            "speciality": "Pédiatrie",
+            "status": "En Consultation",
+            "patients": 38
+        }
+    ])
+
 def get_doctor_data():
     """Retourne la liste des médecins."""
-    doctors = load_doctors()
-    if not doctors:
-        # Données par défaut si le fichier est vide
-        doctors = [
-            {
-                "id": 1,
-                "name": "Benali",
-                "speciality": "Médecine Générale",
-                "status": "Disponible",
-                "patients": 45
-            },
-            {
-                "id": 2,
-                "name": "Meziane",
-                "speciality": "Pédiatrie",
-                "status": "En Consultation",
-                "patients": 38
-            }
-        ]
-        save_doctors(doctors)
-    return doctors
+    _ensure_default_doctors()
+    return load_doctors()
 
 def get_doctor_by_id(doctor_id):
     """Retourne un médecin par son ID."""
-    doctors = get_doctor_data()
-    for doctor in doctors:
-        if doctor['id'] == doctor_id:
-            return doctor
-    return None
+    _ensure_default_doctors()
+    return _doctor_store.get(doctor_id)
+
+def get_doctors_by_speciality(speciality):
+    """Retourne les médecins d'une spécialité donnée."""
+    _ensure_default_doctors()
+    return _doctor_store.by_speciality(speciality)
+
+def get_doctors_by_status(status):
+    """Retourne les médecins ayant un statut donné."""
+    _ensure_default_doctors()
+    return _doctor_store.by_status(status)
 
 def add_or_update_doctor(doctor_data):
     """Ajoute ou met à jour un médecin."""
     try:
-        doctors = get_doctor_data()
-        
-        # Si pas d'ID, c'est un nouveau médecin
-        if not doctor_data.get('id'):
-            # Trouver le prochain ID disponible
-            max_id = max([d['id'] for d in doctors], default=0)
-            doctor_data['id'] = max_id + 1
-            doctors.append(doctor_data)
-            print(f"Nouveau médecin ajouté avec ID: {doctor_data['id']}")
-        else:
-            # Mise à jour d'un médecin existant
-            found = False
-            for i, doctor in enumerate(doctors):
-                if doctor['id'] == doctor_data['id']:
-                    doctors[i] = doctor_data
-                    found = True
-                    print(f"Médecin {doctor_data['id']} mis à jour")
-                    break
-            
-            if not found:
-                print(f"Médecin {doctor_data['id']} non trouvé, ajout comme nouveau")
-                doctors.append(doctor_data)
-        
-        # Sauvegarder
-        return save_doctors(doctors)
+        _ensure_default_doctors()
+        _doctor_store.upsert(doctor_data)
+        invalidate_dashboard()
+        return True
     except Exception as e:
         print(f"Erreur dans add_or_update_doctor: {e}")
         return False
@@ -95,12 +101,9 @@ def add_or_update_doctor(doctor_data):
 def delete_doctor_by_id(doctor_id):
     """Supprime un médecin par son ID."""
     try:
-        doctors = get_doctor_data()
-        initial_length = len(doctors)
-        doctors = [d for d in doctors if d['id'] != doctor_id]
-        
-        if len(doctors) < initial_length:
-            save_doctors(doctors)
+        _ensure_default_doctors()
+        if _doctor_store.delete(doctor_id):
+            invalidate_dashboard()
             print(f"Médecin {doctor_id} supprimé")
             return True
         else:
@@ -113,26 +116,60 @@ def delete_doctor_by_id(doctor_id):
 # --- Fonctions pour les Rendez-vous ---
 
 def load_appointments():
-    """Charge les données des rendez-vous depuis le fichier JSON."""
-    if os.path.exists(APPOINTMENTS_FILE):
-        try:
+    """Charge les données des rendez-vous (snapshot + rejeu du journal)."""
+    try:
+        if _sql_storage is not None:
+            return _sql_storage.load_appointments()
+        with _appointments_lock.acquire(shared=True):
+            if _appointments_journal is not None:
+                return _appointments_journal.load()
+            if not os.path.exists(APPOINTMENTS_FILE):
+                return []
             with open(APPOINTMENTS_FILE, 'r', encoding='utf-8') as f:
                 return json.load(f)
-        except Exception as e:
-            print(f"Erreur lors du chargement des RDV: {e}")
-            return []
-    return []
+    except Exception as e:
+        print(f"Erreur lors du chargement des RDV: {e}")
+        return []
 
 def save_appointments(appointments):
-    """Sauvegarde les données des rendez-vous dans le fichier JSON."""
+    """Sauvegarde les données des rendez-vous (snapshot atomique)."""
     try:
-        with open(APPOINTMENTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(appointments, f, ensure_ascii=False, indent=2)
+        if _sql_storage is not None:
+            _sql_storage.save_appointments(appointments)
+            return True
+        with _appointments_lock.acquire():
+            if _appointments_journal is None:
+                write_snapshot(APPOINTMENTS_FILE, appointments)
+            else:
+                # Remplacement complet : snapshot réécrit, journal vidé
+                _appointments_journal.compact(appointments)
         return True
     except Exception as e:
         print(f"Erreur lors de la sauvegarde des RDV: {e}")
         return False
 
+def add_appointment(appointment):
+    """Ajoute un rendez-vous ; en mode journal, une seule ligne ajoutée au journal."""
+    try:
+        if _sql_storage is not None:
+            _sql_storage.add_appointment(appointment)
+            return True
+        with _appointments_lock.acquire():
+            if _appointments_journal is None:
+                appointments = []
+                if os.path.exists(APPOINTMENTS_FILE):
+                    with open(APPOINTMENTS_FILE, 'r', encoding='utf-8') as f:
+                        appointments = json.load(f)
+                write_snapshot(APPOINTMENTS_FILE, appointments + [appointment])
+            else:
+                _appointments_journal.append('append', record=appointment)
+                if _appointments_journal.needs_compaction():
+                    _appointments_journal.compact(_appointments_journal.load())
+        return True
+    except Exception as e:
+        print(f"Erreur lors de l'ajout du RDV: {e}")
+        return False
+
 def get_appointment_data():
     """Retourne la liste des rendez-vous (données mock par défaut)."""
     appointments = load_appointments()
@@ -156,24 +193,22 @@ def get_appointment_data():
                 "statut": "EN ATTENTE"
             }
         ]
-        save_appointments(appointments)
+        for appointment in appointments:
+            add_appointment(appointment)
     return appointments
 
 # --- Données du Tableau de Bord ---
+_dashboard = DashboardAggregator(
+    PATIENTS_URL, RDV_URL,
+    doctor_count=lambda: _doctor_store.count(),
+    ttl=DASHBOARD_CACHE_TTL
+)
+
 def get_data():
-    """Retourne toutes les données nécessaires au tableau de bord."""
-    return {
-        "global_indicators": [
-            {"label": "Patients Total", "value": 1245, "icon": "users"},
-            {"label": "Médecins", "value": len(get_doctor_data()), "icon": "user-check"},
-            {"label": "RDV Aujourd'hui", "value": len(get_appointment_data()), "icon": "calendar"}
-        ],
-        "monthly_revenue": [
-            {"month": "Jan", "revenue": 45000},
-            {"month": "Fév", "revenue": 52000},
-            {"month": "Mar", "revenue": 48000},
-            {"month": "Avr", "revenue": 61000},
-            {"month": "Mai", "revenue": 55000},
-            {"month": "Juin", "revenue": 67000}
-        ]
-    }
\ No newline at end of file
+    """Retourne toutes les données nécessaires au tableau de bord (mises en cache)."""
+    _ensure_default_doctors()
+    return _dashboard.get()
+
+def invalidate_dashboard():
+    """Force le recalcul du tableau de bord à la prochaine lecture."""
+    _dashboard.invalidate()
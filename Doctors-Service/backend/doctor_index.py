@@ -0,0 +1,39 @@
+import re
+
+# Préfixes "Dr", "Dr.", "dr. Dr " ... en tête de nom
+_DR_PREFIX_RE = re.compile(r'^(dr\.?\s*)+', re.IGNORECASE)
+
+
+def clean_doctor_name(name):
+    """Retire les préfixes "Dr." et les espaces superflus d'un nom."""
+    if not name:
+        return ""
+    return _DR_PREFIX_RE.sub('', str(name).strip()).strip()
+
+
+class DoctorNameIndex:
+    """Index id → nom affiché ("Dr. X") construit une fois par liste de médecins.
+
+    Les clés `id` et `id_medecin` sont indexées sous forme de chaînes ; en cas
+    de doublon, le premier médecin de la liste l'emporte, comme l'ancien
+    parcours linéaire.
+    """
+
+    def __init__(self, doctors):
+        self._names = {}
+        for d in doctors:
+            nom_propre = clean_doctor_name(d.get('name') or d.get('nom_complet'))
+            for key in (d.get('id'), d.get('id_medecin')):
+                if key is None:
+                    continue
+                display = f"Dr. {nom_propre}" if nom_propre else f"Dr. {key} (Nom Vide)"
+                self._names.setdefault(str(key), display)
+
+    def display_name(self, doc_id):
+        if not doc_id:
+            return "ID Manquant"
+        name = self._names.get(str(doc_id))
+        if name is not None:
+            return name
+        nom_base = clean_doctor_name(doc_id)
+        return f" {nom_base}" if nom_base else f"Dr. {doc_id}"
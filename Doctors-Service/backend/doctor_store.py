@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from journal import write_snapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus disponible
+    fcntl = None
+
+
+class FileLock:
+    """Verrou inter-processus (flock) posé sur un fichier `<chemin>.lock`.
+
+    Les lectures prennent un verrou partagé, les écritures un verrou exclusif,
+    ce qui garde plusieurs workers cohérents sur le même fichier JSON.
+    """
+
+    def __init__(self, path):
+        self.path = f"{path}.lock"
+
+    @contextmanager
+    def acquire(self, shared=False):
+        if fcntl is None:
+            yield
+            return
+        with open(self.path, 'a') as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class DoctorStore:
+    """Dépôt des médecins résident en mémoire, indexé par id, spécialité et statut.
+
+    Le fichier JSON n'est relu que lorsque sa signature (mtime, taille, inode)
+    change, donc un `get(id)` ne coûte qu'un `os.stat` et une lecture de dict.
+    Avec un `JsonJournal`, chaque écriture est un simple ajout au journal et le
+    snapshot n'est réécrit qu'à la compaction.
+    """
+
+    _UNLOADED = object()
+
+    def __init__(self, path, journal=None):
+        self.path = path
+        self.journal = journal
+        self.lock = FileLock(path)
+        self._mutex = threading.RLock()
+        self._signature = self._UNLOADED
+        # Dict ordonné : conserve l'ordre du fichier
+        self._by_id = {}
+        self._by_speciality = {}
+        self._by_status = {}
+
+    # --- Chargement et index ---
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+            snapshot = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            snapshot = None
+        if self.journal is None:
+            return snapshot
+        return (snapshot, self.journal.signature())
+
+    def _read_file(self):
+        try:
+            if self.journal is not None:
+                return self.journal.load()
+            if not os.path.exists(self.path):
+                return []
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Erreur lors du chargement des médecins: {e}")
+            return []
+
+    def _index_add(self, doctor):
+        self._by_id[doctor['id']] = doctor
+        self._by_speciality.setdefault(doctor.get('speciality'), {})[doctor['id']] = None
+        self._by_status.setdefault(doctor.get('status'), {})[doctor['id']] = None
+
+    def _index_remove(self, doctor_id):
+        doctor = self._by_id.get(doctor_id)
+        if doctor is None:
+            return
+        self._by_speciality.get(doctor.get('speciality'), {}).pop(doctor_id, None)
+        self._by_status.get(doctor.get('status'), {}).pop(doctor_id, None)
+
+    def _index(self, doctors):
+        self._by_id, self._by_speciality, self._by_status = {}, {}, {}
+        for doctor in doctors:
+            self._index_add(doctor)
+
+    def _refresh_locked(self):
+        """Recharge le fichier si nécessaire ; l'appelant détient déjà le verrou."""
+        signature = self._stat_signature()
+        if signature != self._signature:
+            self._index(self._read_file())
+            self._signature = signature
+
+    def _refresh(self):
+        with self._mutex:
+            if self._stat_signature() == self._signature:
+                return
+            with self.lock.acquire(shared=True):
+                self._refresh_locked()
+
+    # --- Lecture ---
+
+    def all(self):
+        with self._mutex:
+            self._refresh()
+            return [dict(d) for d in self._by_id.values()]
+
+    def count(self):
+        with self._mutex:
+            self._refresh()
+            return len(self._by_id)
+
+    def get(self, doctor_id):
+        with self._mutex:
+            self._refresh()
+            doctor = self._by_id.get(doctor_id)
+            return dict(doctor) if doctor else None
+
+    def by_speciality(self, speciality):
+        with self._mutex:
+            self._refresh()
+            return [dict(self._by_id[i]) for i in self._by_speciality.get(speciality, {})]
+
+    def by_status(self, status):
+        with self._mutex:
+            self._refresh()
+            return [dict(self._by_id[i]) for i in self._by_status.get(status, {})]
+
+    # --- Écriture ---
+
+    def _apply(self, op, **fields):
+        """Applique une mutation en mémoire puis la rend persistante.
+
+        Si l'écriture échoue, l'état en mémoire est invalidé et l'erreur remonte.
+        """
+        if op == 'put':
+            self._index_remove(fields['record']['id'])
+            self._index_add(fields['record'])
+        elif op == 'del':
+            self._index_remove(fields['key'])
+            del self._by_id[fields['key']]
+        elif op == 'replace':
+            self._index(fields['records'])
+
+        try:
+            if self.journal is None:
+                write_snapshot(self.path, list(self._by_id.values()))
+            elif op == 'replace':
+                # L'entrée contiendrait toute la collection : autant compacter
+                self.journal.compact(list(self._by_id.values()))
+            else:
+                self.journal.append(op, **fields)
+                if self.journal.needs_compaction():
+                    self.journal.compact(list(self._by_id.values()))
+        except Exception:
+            # Écriture échouée : la mémoire ne reflète plus le disque, la
+            # prochaine lecture recharge le fichier
+            self._signature = self._UNLOADED
+            raise
+        self._signature = self._stat_signature()
+
+    def compact(self):
+        """Force la reconstruction du snapshot à partir du journal."""
+        if self.journal is None:
+            return
+        with self._mutex, self.lock.acquire():
+            self._refresh_locked()
+            self.journal.compact(list(self._by_id.values()))
+            self._signature = self._stat_signature()
+
+    def replace_all(self, doctors):
+        with self._mutex, self.lock.acquire():
+            self._refresh_locked()
+            self._apply('replace', records=[dict(d) for d in doctors])
+
+    def upsert(self, doctor_data):
+        """Ajoute ou remplace un médecin ; attribue un id s'il n'en a pas."""
+        with self._mutex, self.lock.acquire():
+            self._refresh_locked()
+            if not doctor_data.get('id'):
+                doctor_data['id'] = max(self._by_id, default=0) + 1
+                print(f"Nouveau médecin ajouté avec ID: {doctor_data['id']}")
+            elif doctor_data['id'] in self._by_id:
+                print(f"Médecin {doctor_data['id']} mis à jour")
+            else:
+                print(f"Médecin {doctor_data['id']} non trouvé, ajout comme nouveau")
+            self._apply('put', record=dict(doctor_data))
+
+    def delete(self, doctor_id):
+        """Supprime un médecin ; retourne False s'il n'existe pas."""
+        with self._mutex, self.lock.acquire():
+            self._refresh_locked()
+            if doctor_id not in self._by_id:
+                return False
+            self._apply('del', key=doctor_id)
+            return True
@@ -0,0 +1,174 @@
+import json
+import os
+import zlib
+
+# Nombre d'entrées de journal au-delà duquel le snapshot est reconstruit
+DEFAULT_COMPACT_EVERY = 200
+
+
+def _fsync_dir(path):
+    """Rend durable un rename dans le dossier `path` (sans effet hors POSIX)."""
+    try:
+        fd = os.open(path or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_snapshot(path, records):
+    """Écrit `records` dans `path` de façon atomique (tmp + fsync + rename)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(os.path.dirname(path))
+
+
+class JsonJournal:
+    """Journal d'écritures (write-ahead) en JSON lines devant un snapshot JSON.
+
+    Chaque mutation est ajoutée en une ligne compacte puis fsync'ée ; le
+    snapshot n'est réécrit qu'à la compaction. La première ligne du journal
+    identifie le snapshot auquel il s'applique (taille + crc32), ce qui permet
+    d'ignorer un journal déjà compacté si le processus est tué entre le rename
+    du snapshot et la troncature du journal.
+
+    Opérations : `put` / `del` (collection indexée par `key`), `append`
+    (collection sans clé) et `replace` (remplacement complet). Un
+    remplacement complet se fait plutôt par `compact(records)` : l'entrée
+    `replace` copierait toute la collection dans le journal.
+    L'appelant est responsable du verrouillage inter-processus.
+    """
+
+    def __init__(self, snapshot_path, key='id', compact_every=DEFAULT_COMPACT_EVERY):
+        self.snapshot_path = snapshot_path
+        self.path = f"{snapshot_path}.journal"
+        self.key = key
+        self.compact_every = compact_every
+        self.entries = 0
+
+    # --- Lecture ---
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return b'', []
+        with open(self.snapshot_path, 'rb') as f:
+            raw = f.read()
+        if not raw.strip():
+            return raw, []
+        return raw, json.loads(raw.decode('utf-8'))
+
+    @staticmethod
+    def _base_header(raw):
+        return {"op": "base", "size": len(raw), "crc": zlib.crc32(raw)}
+
+    def _read_entries(self, header):
+        """Retourne les entrées applicables au snapshot décrit par `header`."""
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')
+        for i, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Dernière ligne tronquée par un crash : on l'ignore
+                print(f"Entrée de journal illisible ignorée ({self.path}:{i + 1})")
+                continue
+            if entry.get('op') == 'base':
+                if entry != header:
+                    # Journal d'un snapshot précédent, déjà compacté
+                    return []
+                continue
+            entries.append(entry)
+        return entries
+
+    def load(self):
+        """Reconstruit la collection : snapshot puis rejeu du journal."""
+        raw, records = self._read_snapshot()
+        entries = self._read_entries(self._base_header(raw))
+        self.entries = len(entries)
+        if self.key is None:
+            items = list(records)
+            for entry in entries:
+                if entry['op'] == 'append':
+                    items.append(entry['record'])
+                elif entry['op'] == 'replace':
+                    items = list(entry['records'])
+            return items
+
+        items = {r[self.key]: r for r in records}
+        for entry in entries:
+            if entry['op'] == 'put':
+                items[entry['record'][self.key]] = entry['record']
+            elif entry['op'] == 'del':
+                items.pop(entry['key'], None)
+            elif entry['op'] == 'replace':
+                items = {r[self.key]: r for r in entry['records']}
+        return list(items.values())
+
+    # --- Écriture ---
+
+    def _truncate_torn_tail(self):
+        """Coupe une dernière ligne incomplète laissée par un crash pendant un ajout.
+
+        Sans cela, l'entrée suivante serait collée au fragment et ignorée au rejeu.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if not size:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            f.seek(0)
+            keep = f.read().rfind(b'\n') + 1
+            print(f"Fin de journal incomplète tronquée ({self.path}, {size - keep} octets)")
+            f.truncate(keep)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, op, **fields):
+        """Ajoute une mutation au journal et la rend durable (fsync)."""
+        entry = dict(op=op, **fields)
+        self._truncate_torn_tail()
+        new_journal = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', encoding='utf-8') as f:
+            if new_journal:
+                raw, _ = self._read_snapshot()
+                f.write(json.dumps(self._base_header(raw)) + '\n')
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries += 1
+
+    def needs_compaction(self):
+        return self.entries >= self.compact_every
+
+    def compact(self, records):
+        """Réécrit le snapshot à partir de `records` puis vide le journal."""
+        write_snapshot(self.snapshot_path, records)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries = 0
+
+    def signature(self):
+        """Signature (mtime, taille, inode) du journal, None s'il n'existe pas."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
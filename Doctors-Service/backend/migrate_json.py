@@ -0,0 +1,37 @@
+"""Migration ponctuelle des fichiers JSON vers la base SQL du service Doctors.
+
+Usage : python migrate_json.py [--force]
+
+Lit doctors_data.json / appointments_data.json (journal compris) et les copie
+dans DOCTORS_DATABASE_URI. Refuse d'écraser une base déjà remplie sans --force.
+"""
+import sys
+from config import DATA_JOURNAL, JOURNAL_COMPACT_EVERY, DOCTORS_DATABASE_URI
+from doctor_store import DoctorStore
+from journal import JsonJournal
+from sql_store import SqlStorage
+
+DOCTORS_FILE = 'doctors_data.json'
+APPOINTMENTS_FILE = 'appointments_data.json'
+
+
+def migrate(force=False):
+    storage = SqlStorage(DOCTORS_DATABASE_URI)
+    if storage.doctors.count() and not force:
+        print("La base contient déjà des médecins (utiliser --force pour écraser).")
+        return False
+
+    doctors = DoctorStore(
+        DOCTORS_FILE,
+        journal=JsonJournal(DOCTORS_FILE, compact_every=JOURNAL_COMPACT_EVERY) if DATA_JOURNAL else None
+    ).all()
+    appointments = JsonJournal(APPOINTMENTS_FILE, key=None).load()
+
+    storage.doctors.replace_all(doctors)
+    storage.save_appointments(appointments)
+    print(f"✅ {len(doctors)} médecins et {len(appointments)} rendez-vous migrés vers {DOCTORS_DATABASE_URI}")
+    return True
+
+
+if __name__ == '__main__':
+    migrate(force='--force' in sys.argv)
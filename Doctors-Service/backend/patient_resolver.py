@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+import requests
+from http_client import service_client
+
+_MISSING = object()
+
+
+class PatientNameResolver:
+    """Résout des noms de patients en identifiants, par lot et avec cache.
+
+    Tous les noms non résolus d'une requête partent en un seul appel
+    `POST /api/patients/lookup` vers Patient-Service. Les résultats (y compris
+    les noms introuvables) sont gardés dans un cache LRU borné avec TTL,
+    partagé entre les requêtes.
+    """
+
+    def __init__(self, patients_url, ttl=300, max_entries=5000, timeout=(2, 3)):
+        self.patients_url = patients_url
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name):
+        return " ".join(str(name).split()).lower()
+
+    def _cache_get(self, key, now):
+        entry = self._cache.get(key)
+        if entry is None:
+            return _MISSING
+        patient_id, expires_at = entry
+        if expires_at < now:
+            del self._cache[key]
+            return _MISSING
+        self._cache.move_to_end(key)
+        return patient_id
+
+    def _cache_put(self, key, patient_id, now):
+        self._cache[key] = (patient_id, now + self.ttl)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def resolve_many(self, names):
+        """Retourne {nom: id ou None} pour tous les noms demandés."""
+        now = time.monotonic()
+        resolved, missing = {}, []
+        with self._lock:
+            for name in names:
+                key = self._key(name)
+                if not key:
+                    continue
+                patient_id = self._cache_get(key, now)
+                if patient_id is _MISSING:
+                    missing.append(key)
+                else:
+                    resolved[key] = patient_id
+
+        if missing:
+            missing = list(dict.fromkeys(missing))
+            try:
+                found = self._lookup(missing)
+            except requests.exceptions.RequestException as e:
+                # Patient-Service injoignable : on ne met rien en cache
+                print(f"Erreur lors de la résolution des patients: {e}")
+                found = None
+            if found is not None:
+                with self._lock:
+                    for key in missing:
+                        resolved[key] = found.get(key)
+                        self._cache_put(key, resolved[key], now)
+
+        return {name: resolved.get(self._key(name)) for name in names}
+
+    def _lookup(self, keys):
+        response = service_client.post(
+            f"{self.patients_url}/api/patients/lookup",
+            json={"names": keys},
+            timeout=self.timeout
+        )
+        if response.status_code in (404, 405):
+            # Ancienne version de Patient-Service : un seul téléchargement pour tout le lot
+            return self._lookup_by_scan(keys)
+        response.raise_for_status()
+        matches = response.json().get('matches', {})
+        return {self._key(name): patient_id for name, patient_id in matches.items()}
+
+    def _lookup_by_scan(self, keys):
+        response = service_client.get(
+            f"{self.patients_url}/api/patients",
+            params={"all": "true"},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        full_names = [
+            (f"{p.get('prenom', '')} {p.get('nom', '')}".strip().lower(), p.get('id'))
+            for p in response.json()
+        ]
+        found = {}
+        for key in keys:
+            for full_name, patient_id in full_names:
+                if full_name == key or key in full_name:
+                    found[key] = patient_id
+                    break
+        return found
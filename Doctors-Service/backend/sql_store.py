@@ -0,0 +1,157 @@
+import os
+from sqlalchemy import create_engine, event, select, delete, func, Integer, String
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+# ==================== MODELS ====================
+class Doctor(Base):
+    __tablename__ = 'doctor'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    speciality: Mapped[str] = mapped_column(String(100), index=True, default='Inconnu')
+    status: Mapped[str] = mapped_column(String(50), index=True, default='Disponible')
+    patients: Mapped[int] = mapped_column(Integer, default=0)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'speciality': self.speciality,
+            'status': self.status,
+            'patients': self.patients
+        }
+
+
+class Appointment(Base):
+    __tablename__ = 'appointment'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    heure: Mapped[str] = mapped_column(String(20), index=True, nullable=True)
+    patient: Mapped[str] = mapped_column(String(100), nullable=True)
+    patient_id: Mapped[str] = mapped_column(String(50), nullable=True)
+    medecin: Mapped[str] = mapped_column(String(50), index=True, nullable=True)
+    motif: Mapped[str] = mapped_column(String(200), nullable=True)
+    statut: Mapped[str] = mapped_column(String(50), nullable=True)
+
+    FIELDS = ('heure', 'patient', 'patient_id', 'medecin', 'motif', 'statut')
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+def _doctor_columns(doctor_data):
+    return {
+        'name': doctor_data.get('name'),
+        'speciality': doctor_data.get('speciality', 'Inconnu'),
+        'status': doctor_data.get('status', 'Disponible'),
+        'patients': doctor_data.get('patients', 0) or 0
+    }
+
+
+def _appointment_columns(appointment):
+    data = {field: appointment.get(field) for field in Appointment.FIELDS}
+    # Les identifiants peuvent être des entiers (mock) ou des chaînes (RDV-Service)
+    for field in ('patient_id', 'medecin'):
+        if data[field] is not None:
+            data[field] = str(data[field])
+    return data
+
+
+# ==================== STORES ====================
+class SqlDoctorStore:
+    """Même interface que `DoctorStore`, servie par une base SQL indexée."""
+
+    def __init__(self, session_factory):
+        self.Session = session_factory
+
+    def all(self):
+        with self.Session() as session:
+            return [d.to_dict() for d in session.scalars(select(Doctor).order_by(Doctor.id))]
+
+    def count(self):
+        with self.Session() as session:
+            return session.scalar(select(func.count()).select_from(Doctor))
+
+    def get(self, doctor_id):
+        with self.Session() as session:
+            doctor = session.get(Doctor, doctor_id)
+            return doctor.to_dict() if doctor else None
+
+    def by_speciality(self, speciality):
+        with self.Session() as session:
+            query = select(Doctor).where(Doctor.speciality == speciality).order_by(Doctor.id)
+            return [d.to_dict() for d in session.scalars(query)]
+
+    def by_status(self, status):
+        with self.Session() as session:
+            query = select(Doctor).where(Doctor.status == status).order_by(Doctor.id)
+            return [d.to_dict() for d in session.scalars(query)]
+
+    def replace_all(self, doctors):
+        with self.Session.begin() as session:
+            session.execute(delete(Doctor))
+            session.add_all(Doctor(id=d['id'], **_doctor_columns(d)) for d in doctors)
+
+    def upsert(self, doctor_data):
+        """Ajoute ou remplace un médecin ; attribue un id s'il n'en a pas."""
+        with self.Session.begin() as session:
+            doctor = session.get(Doctor, doctor_data['id']) if doctor_data.get('id') else None
+            if doctor is None:
+                doctor = Doctor(id=doctor_data.get('id') or None, **_doctor_columns(doctor_data))
+                session.add(doctor)
+                session.flush()
+                print(f"Nouveau médecin ajouté avec ID: {doctor.id}")
+            else:
+                for column, value in _doctor_columns(doctor_data).items():
+                    setattr(doctor, column, value)
+                print(f"Médecin {doctor.id} mis à jour")
+            doctor_data['id'] = doctor.id
+
+    def delete(self, doctor_id):
+        """Supprime un médecin ; retourne False s'il n'existe pas."""
+        with self.Session.begin() as session:
+            deleted = session.execute(delete(Doctor).where(Doctor.id == doctor_id)).rowcount
+        return bool(deleted)
+
+
+class SqlStorage:
+    """Backend SQLAlchemy (SQLite par défaut) pour médecins et rendez-vous."""
+
+    def __init__(self, database_uri):
+        if database_uri.startswith('sqlite:///'):
+            folder = os.path.dirname(database_uri[len('sqlite:///'):])
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+        self.engine = create_engine(database_uri, pool_pre_ping=True)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _configure_sqlite)
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(self.engine, expire_on_commit=False)
+        self.doctors = SqlDoctorStore(self.Session)
+
+    def load_appointments(self):
+        with self.Session() as session:
+            return [a.to_dict() for a in session.scalars(select(Appointment).order_by(Appointment.id))]
+
+    def add_appointment(self, appointment):
+        with self.Session.begin() as session:
+            session.add(Appointment(**_appointment_columns(appointment)))
+
+    def save_appointments(self, appointments):
+        with self.Session.begin() as session:
+            session.execute(delete(Appointment))
+            session.add_all(Appointment(**_appointment_columns(a)) for a in appointments)
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    # WAL : les lecteurs ne bloquent pas l'écrivain, plusieurs workers possibles
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
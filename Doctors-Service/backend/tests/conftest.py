@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Les modules du backend s'importent à plat (`from journal import ...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Comme app.py : config met shared/ (http_client) sur sys.path
+import config  # noqa: E402,F401
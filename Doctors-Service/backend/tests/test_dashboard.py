@@ -0,0 +1,63 @@
+import threading
+import time
+
+from dashboard import DashboardAggregator
+
+
+class SlowAggregator(DashboardAggregator):
+    """Agrégateur dont le calcul attend `release` (services amont lents)."""
+
+    def __init__(self):
+        super().__init__('http://patients', 'http://rdv', doctor_count=lambda: 0, ttl=60)
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = 0
+
+    def _compute(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return {"calcul": self.calls}
+
+
+def test_invalidate_does_not_wait_for_a_slow_refresh():
+    aggregator = SlowAggregator()
+    reader = threading.Thread(target=aggregator.get)
+    reader.start()
+    assert aggregator.started.wait(5)
+
+    start = time.monotonic()
+    aggregator.invalidate()
+    assert time.monotonic() - start < 0.5
+
+    aggregator.release.set()
+    reader.join(5)
+
+
+def test_concurrent_reads_share_one_computation():
+    aggregator = SlowAggregator()
+    results = []
+    readers = [threading.Thread(target=lambda: results.append(aggregator.get())) for _ in range(5)]
+    for reader in readers:
+        reader.start()
+    assert aggregator.started.wait(5)
+    time.sleep(0.1)
+    aggregator.release.set()
+    for reader in readers:
+        reader.join(5)
+
+    assert aggregator.calls == 1
+    assert results == [{"calcul": 1}] * 5
+    assert aggregator.get() == {"calcul": 1}
+
+
+def test_result_computed_before_an_invalidation_is_not_cached():
+    aggregator = SlowAggregator()
+    reader = threading.Thread(target=aggregator.get)
+    reader.start()
+    assert aggregator.started.wait(5)
+    aggregator.invalidate()
+    aggregator.release.set()
+    reader.join(5)
+
+    assert aggregator.get() == {"calcul": 2}
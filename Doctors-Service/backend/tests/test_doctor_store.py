@@ -0,0 +1,64 @@
+import pytest
+
+import doctor_store
+from doctor_store import DoctorStore
+from journal import JsonJournal
+
+
+def _doctor(doctor_id, name, speciality="Pédiatrie", status="Disponible"):
+    return {"id": doctor_id, "name": name, "speciality": speciality, "status": status, "patients": 0}
+
+
+@pytest.fixture(params=['snapshot', 'journal'])
+def make_store(request, tmp_path):
+    path = str(tmp_path / "doctors.json")
+
+    def make():
+        journal = JsonJournal(path) if request.param == 'journal' else None
+        return DoctorStore(path, journal=journal)
+    return make
+
+
+def test_indexes_follow_updates(make_store):
+    store = make_store()
+    store.upsert(_doctor(1, "Benali"))
+    store.upsert(_doctor(2, "Meziane", speciality="Cardiologie"))
+
+    store.upsert(_doctor(1, "Benali", speciality="Cardiologie", status="En congé"))
+    store.delete(2)
+
+    assert store.get(2) is None
+    assert [d["id"] for d in store.by_speciality("Cardiologie")] == [1]
+    assert store.by_speciality("Pédiatrie") == []
+    assert [d["id"] for d in store.by_status("En congé")] == [1]
+    assert store.by_status("Disponible") == []
+
+
+def test_other_worker_writes_are_picked_up(make_store):
+    # Deux instances sur le même fichier : deux workers gunicorn
+    first, second = make_store(), make_store()
+    first.upsert(_doctor(1, "Benali"))
+    assert second.get(1)["name"] == "Benali"
+
+    second.upsert(_doctor(1, "Benali-Haddad"))
+    second.upsert({"name": "Meziane", "speciality": "Cardiologie", "status": "Disponible", "patients": 0})
+
+    assert first.get(1)["name"] == "Benali-Haddad"
+    assert [d["name"] for d in first.all()] == ["Benali-Haddad", "Meziane"]
+
+
+def test_failed_write_is_not_served_from_memory(make_store, monkeypatch):
+    store = make_store()
+    store.upsert(_doctor(1, "Benali"))
+
+    def fail(*args, **kwargs):
+        raise OSError("disque plein")
+    monkeypatch.setattr(doctor_store, 'write_snapshot', fail)
+    if store.journal is not None:
+        monkeypatch.setattr(store.journal, 'append', fail)
+
+    with pytest.raises(OSError):
+        store.upsert(_doctor(2, "Meziane"))
+
+    assert store.get(2) is None
+    assert [d["id"] for d in store.all()] == [1]
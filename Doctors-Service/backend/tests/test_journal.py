@@ -0,0 +1,53 @@
+from doctor_store import DoctorStore
+from journal import JsonJournal
+
+
+def _doctor(doctor_id, name):
+    return {"id": doctor_id, "name": name, "speciality": "Pédiatrie", "status": "Disponible", "patients": 0}
+
+
+def test_replay_after_torn_tail(tmp_path):
+    journal = JsonJournal(str(tmp_path / "doctors.json"))
+    journal.append('put', record=_doctor(1, "Benali"))
+    # Crash au milieu d'un ajout : ligne incomplète, sans '\n'
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"op":"put","record":{"id":2,"na')
+
+    journal.append('put', record=_doctor(3, "Meziane"))
+
+    assert [d["id"] for d in JsonJournal(journal.snapshot_path).load()] == [1, 3]
+
+
+def test_store_write_after_torn_tail_survives_reload(tmp_path):
+    path = str(tmp_path / "doctors.json")
+    store = DoctorStore(path, journal=JsonJournal(path))
+    store.upsert(_doctor(1, "Benali"))
+    with open(store.journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"op":"del","ke')
+
+    store.upsert(_doctor(2, "Meziane"))
+
+    reloaded = DoctorStore(path, journal=JsonJournal(path))
+    assert [d["name"] for d in reloaded.all()] == ["Benali", "Meziane"]
+
+
+def test_torn_base_header_is_rewritten(tmp_path):
+    journal = JsonJournal(str(tmp_path / "doctors.json"))
+    with open(journal.path, 'w', encoding='utf-8') as f:
+        f.write('{"op":"ba')
+
+    journal.append('put', record=_doctor(1, "Benali"))
+
+    assert [d["id"] for d in JsonJournal(journal.snapshot_path).load()] == [1]
+
+
+def test_appointment_append_replays_after_compaction(tmp_path):
+    journal = JsonJournal(str(tmp_path / "appointments.json"), key=None, compact_every=3)
+    for i in range(4):
+        journal.append('append', record={"heure": f"0{i}:00"})
+        if journal.needs_compaction():
+            journal.compact(journal.load())
+
+    assert [a["heure"] for a in JsonJournal(journal.snapshot_path, key=None).load()] == [
+        "00:00", "01:00", "02:00", "03:00"
+    ]
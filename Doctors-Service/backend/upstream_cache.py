@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from http_client import service_client
+
+
+class StaleWhileRevalidateCache:
+    """Cache des réponses amont, clé = URL + paramètres.
+
+    - dans le TTL : la copie en cache est servie telle quelle ;
+    - après le TTL : la copie périmée est servie immédiatement et un
+      rafraîchissement est lancé en arrière-plan (un seul par clé) ;
+    - jamais chargée : l'appel est fait de façon synchrone (un seul appel
+      simultané par clé) et `None` est retourné en cas d'échec.
+
+    Après un échec, la clé n'est plus réinterrogée avant un délai qui double
+    à chaque échec consécutif (de `ttl` à `max_backoff` secondes) : pendant
+    une panne, chaque lecture ne relance pas un appel amont.
+    """
+
+    def __init__(self, ttl=15, max_workers=4, max_backoff=300):
+        self.ttl = ttl
+        self.max_backoff = max_backoff
+        self._entries = {}
+        # clé -> (échecs consécutifs, instant monotonic de la prochaine tentative)
+        self._failures = {}
+        self._refreshing = set()
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='swr')
+
+    @staticmethod
+    def make_key(url, params=None, scope=None):
+        return (url, tuple(sorted((params or {}).items())), scope)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._failures.pop(key, None)
+
+    def _record_failure(self, key, ttl):
+        with self._lock:
+            count = self._failures.get(key, (0, 0))[0] + 1
+            delay = min(self.max_backoff, max(ttl, 1) * 2 ** (count - 1))
+            self._failures[key] = (count, time.monotonic() + delay)
+
+    def _backing_off(self, key):
+        """Vrai si la clé a échoué récemment ; l'appelant détient `_lock`."""
+        failure = self._failures.get(key)
+        return failure is not None and time.monotonic() < failure[1]
+
+    def _refresh(self, key, fetch, ttl):
+        try:
+            self._store(key, fetch())
+        except Exception as e:
+            self._record_failure(key, ttl)
+            print(f"Rafraîchissement en arrière-plan échoué pour {key[0]}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key, fetch, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                if (time.monotonic() - fetched_at >= ttl and key not in self._refreshing
+                        and not self._backing_off(key)):
+                    self._refreshing.add(key)
+                    self._executor.submit(self._refresh, key, fetch, ttl)
+                return value
+            if self._backing_off(key):
+                return None
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Un autre thread a peut-être chargé la clé pendant l'attente
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None and self._backing_off(key):
+                    return None
+            if entry is not None:
+                return entry[0]
+            try:
+                value = fetch()
+            except Exception as e:
+                self._record_failure(key, ttl)
+                print(f"Chargement de {key[0]} impossible: {e}")
+                return None
+            self._store(key, value)
+            return value
+
+    def invalidate(self, url=None):
+        """Oublie toutes les entrées (ou seulement celles d'une URL)."""
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+                self._failures.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == url]:
+                    del self._entries[key]
+                for key in [k for k in self._failures if k[0] == url]:
+                    del self._failures[key]
+
+
+upstream_cache = StaleWhileRevalidateCache()
+
+
+def cached_get_json(url, params=None, ttl=None, scope=None, timeout=None):
+    """GET JSON via le cache SWR ; `None` si l'amont n'a jamais répondu."""
+    def fetch():
+        kwargs = {'params': params}
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        response = service_client.get(url, **kwargs)
+        # Toute réponse hors 2xx est un échec : rien n'est mis en cache
+        if not 200 <= response.status_code < 300:
+            raise requests.exceptions.HTTPError(
+                f"{response.status_code} pour {url}", response=response)
+        return response.json()
+
+    return upstream_cache.get(upstream_cache.make_key(url, params, scope), fetch, ttl=ttl)
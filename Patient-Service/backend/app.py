@@ -1,18 +1,40 @@
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, Request, request, jsonify, make_response, send_file, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_migrate import Migrate
+from sqlalchemy.orm import selectinload
 from datetime import datetime
 from werkzeug.utils import secure_filename
 import os
-import io
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+import json
+import base64
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import requests
+import click
+import config  # puts shared/ (http_client) on sys.path
+from http_client import service_client
+from patient_search import PatientSearchIndex, normalize_text
+from patient_autocomplete import PatientAutocomplete
+from id_allocator import IdAllocator
+from ordonnance_pdf import PdfCache, compute_age, pdf_cache_key, render_ordonnance_pdf
+from ordonnance_export import get_render_pool, render_documents, start_render_pool, stream_merged_pdf, stream_zip
+from photo_store import InvalidPhoto, PhotoStore
+from patient_bulk import FORMATS, PatientImporter, export_patients
+from query_plan import check_query_plans
+
+class PatientRequest(Request):
+    @property
+    def max_content_length(self):
+        # Bulk imports carry whole patient files
+        if self.endpoint == 'import_patients':
+            return app.config['IMPORT_MAX_CONTENT_LENGTH']
+        return super().max_content_length
 
 app = Flask(__name__)
+app.request_class = PatientRequest
 app.secret_key = os.getenv('SECRET_KEY', 'clinique2025')
 
 # CORS configuration for React frontend
@@ -20,7 +42,8 @@ CORS(app, resources={
     r"/*": {
         "origins": ["*"],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization"],
+        "expose_headers": ["X-Total-Count"]
     }
 })
 
@@ -28,21 +51,48 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URI', 'sqlite:///pat
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024
+app.config['IMPORT_MAX_CONTENT_LENGTH'] = int(os.getenv('IMPORT_MAX_MB', 200)) * 1024 * 1024
+
+# Pagination of GET /api/patients
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# GET /api/patients/<id>: related collections and latest observations returned
+PATIENT_INCLUDES = ('observations', 'ordonnances')
+DEFAULT_OBSERVATIONS_LIMIT = int(os.getenv('DEFAULT_OBSERVATIONS_LIMIT', 50))
+MAX_OBSERVATIONS_LIMIT = 1000
 
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+photo_store = PhotoStore(app.config['UPLOAD_FOLDER'])
+PHOTO_MAX_AGE = 365 * 24 * 3600
 
 # External service URLs - استخدام أسماء الـ containers
 RDV_SERVICE_URL = os.getenv('RDV_URL', "http://rdv-backend:5005")
 DOCTORS_SERVICE_URL = os.getenv('DOCTORS_URL', "http://doctors-service:5000")
 
+# Ordonnance PDFs: rendered once, cached on disk, pre-rendered after creation
+pdf_cache = PdfCache(os.getenv('PDF_CACHE_DIR', os.path.join(app.instance_path, 'pdf_cache')),
+                     max_bytes=int(os.getenv('PDF_CACHE_MAX_MB', 200)) * 1024 * 1024)
+PDF_PRERENDER = os.getenv('PDF_PRERENDER', 'true').lower() == 'true'
+pdf_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='pdf')
+DOCTOR_NAME_TTL = int(os.getenv('DOCTOR_NAME_TTL', 300))
+PDF_EXPORT_WORKERS = int(os.getenv('PDF_EXPORT_WORKERS', 0)) or None
+MAX_EXPORT_DOCUMENTS = int(os.getenv('MAX_EXPORT_DOCUMENTS', 2000))
+# A merged PDF is built in memory (its index comes last): smaller cap than the ZIP
+MAX_MERGED_PDF_DOCUMENTS = int(os.getenv('MAX_MERGED_PDF_DOCUMENTS', 200))
+DOCTOR_NAME_CACHE_SIZE = int(os.getenv('DOCTOR_NAME_CACHE_SIZE', 5000))
+# patient_id -> (doctor name, fetched at), least recently used first
+doctor_name_cache = OrderedDict()
+doctor_name_lock = threading.Lock()
+
 # ==================== MODELS ====================
 class Patient(db.Model):
     id = db.Column(db.String(10), primary_key=True)
     nom = db.Column(db.String(50), nullable=False)
     prenom = db.Column(db.String(50), nullable=False)
-    date_naissance = db.Column(db.String(20), nullable=False)
+    date_naissance = db.Column(db.Date, nullable=False)
     sexe = db.Column(db.String(10), nullable=False)
     telephone = db.Column(db.String(30), nullable=False)
     email = db.Column(db.String(100))
@@ -54,13 +104,23 @@ class Patient(db.Model):
     observations = db.relationship('Observation', backref='patient', lazy=True, cascade="all, delete-orphan")
     ordonnances = db.relationship('Ordonnance', backref='patient', lazy=True, cascade="all, delete-orphan")
     
-    def to_dict(self, include_details=False):
+    # Keyset pagination order
+    __table_args__ = (db.Index('ix_patient_nom_id', 'nom', 'id'),)
+    
+    def to_dict(self, include_details=False, fields=None, include=None, observations=None):
+        """Serialize the patient.
+
+        `fields` restricts the scalar fields returned, `include` the related
+        collections (defaults to both when `include_details` is set).
+        `observations` is an already bounded list to use instead of the
+        full relationship.
+        """
         data = {
             'id': self.id,
             'nom': self.nom,
             'prenom': self.prenom,
             'nom_complet': f"{self.prenom} {self.nom}",
-            'date_naissance': self.date_naissance,
+            'date_naissance': self.date_naissance.isoformat(),
             'sexe': self.sexe,
             'telephone': self.telephone,
             'email': self.email,
@@ -70,9 +130,16 @@ class Patient(db.Model):
             'maladies': self.maladies,
             'photo': self.photo
         }
+        if fields:
+            data = {k: v for k, v in data.items() if k in fields}
         
-        if include_details:
-            data['observations'] = [obs.to_dict() for obs in self.observations]
+        if include is None:
+            include = PATIENT_INCLUDES if include_details else ()
+        if 'observations' in include:
+            if observations is None:
+                observations = self.observations
+            data['observations'] = [obs.to_dict() for obs in observations]
+        if 'ordonnances' in include:
             data['ordonnances'] = [ord.to_dict() for ord in self.ordonnances]
             
         return data
@@ -84,6 +151,9 @@ class Observation(db.Model):
     auteur_id = db.Column(db.String(10))
     patient_id = db.Column(db.String(10), db.ForeignKey('patient.id'), nullable=False)
     
+    # Latest observations of a patient
+    __table_args__ = (db.Index('ix_observation_patient_date', 'patient_id', 'date'),)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -99,6 +169,9 @@ class Ordonnance(db.Model):
     medicaments = db.Column(db.Text, nullable=False)
     patient_id = db.Column(db.String(10), db.ForeignKey('patient.id'), nullable=False)
     
+    # Ordonnances of a patient (detail view, bulk export)
+    __table_args__ = (db.Index('ix_ordonnance_patient_date', 'patient_id', 'date'),)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -107,34 +180,240 @@ class Ordonnance(db.Model):
             'patient_id': self.patient_id
         }
 
+search_index = PatientSearchIndex(db, Patient)
+autocomplete_index = PatientAutocomplete(db, Patient)
+id_allocator = IdAllocator(db, block_size=int(os.getenv('ID_BLOCK_SIZE', 50)))
+id_allocator.register('patient', 'PT')
+id_allocator.register('ordonnance', 'ORD')
+
+importer = PatientImporter(db, Patient, id_allocator, search_index, autocomplete_index,
+                           batch_size=int(os.getenv('IMPORT_BATCH_SIZE', 1000)))
+
 with app.app_context():
     db.create_all()
+    search_index.setup()
+    autocomplete_index.setup(app)
+    id_allocator.setup({
+        'patient': lambda: [row[0] for row in db.session.query(Patient.id)],
+        'ordonnance': lambda: [row[0] for row in db.session.query(Ordonnance.id)],
+    })
 
 # ==================== PATIENTS API ====================
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+def encode_cursor(patient):
+    """Opaque keyset cursor for the (nom, id) ordering"""
+    raw = json.dumps([patient.nom, patient.id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def encode_search_cursor(offset):
+    """Cursor for ranked search results (position in the ranking)"""
+    raw = json.dumps({'offset': offset}).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+
 @app.route('/api/patients', methods=['GET'])
 def get_all_patients():
-    """Get all patients"""
+    """Get patients: a plain list, or one keyset page at a time with ?limit= / ?cursor="""
     search = request.args.get('q', '').strip()
+    paged = 'limit' in request.args or 'cursor' in request.args
     
+    if search and search_index.available and search_index.match_expression(search):
+        return search_patients_ranked(search, paged)
+    
+    query = Patient.query
     if search:
-        patients = Patient.query.filter(
+        query = query.filter(
             db.or_(
                 Patient.nom.contains(search),
                 Patient.prenom.contains(search),
                 Patient.telephone.contains(search),
                 Patient.id.contains(search)
             )
-        ).order_by(Patient.nom).all()
-    else:
-        patients = Patient.query.order_by(Patient.nom).all()
+        )
+    
+    # Default shape: every match as a bare list
+    if not paged:
+        patients = query.order_by(Patient.nom).all()
+        return jsonify([p.to_dict() for p in patients])
+    
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
     
-    return jsonify([p.to_dict() for p in patients])
+    page_query = query
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            last_nom, last_id = decode_cursor(cursor)
+        except (ValueError, TypeError, KeyError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        page_query = page_query.filter(
+            db.or_(
+                Patient.nom > last_nom,
+                db.and_(Patient.nom == last_nom, Patient.id > last_id)
+            )
+        )
+    
+    patients = page_query.order_by(Patient.nom, Patient.id).limit(limit + 1).all()
+    has_more = len(patients) > limit
+    patients = patients[:limit]
+    
+    response = jsonify({
+        'items': [p.to_dict() for p in patients],
+        'next_cursor': encode_cursor(patients[-1]) if has_more else None,
+        'limit': limit
+    })
+    if request.args.get('with_total', '').lower() in ('true', '1'):
+        total = query.with_entities(db.func.count(Patient.id)).order_by(None).scalar()
+        response.headers['X-Total-Count'] = str(total)
+    return response
+
+def search_patients_ranked(search, paged):
+    """Full-text search through the FTS5 index, ordered by relevance"""
+    if not paged:
+        ids = search_index.search_ids(search)
+        limit = offset = None
+    else:
+        try:
+            limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+            cursor = request.args.get('cursor')
+            offset = int(decode_cursor(cursor)['offset']) if cursor else 0
+        except (ValueError, TypeError, KeyError):
+            return jsonify({'error': 'Invalid limit or cursor'}), 400
+        ids = search_index.search_ids(search, limit=limit + 1, offset=offset)
+    
+    has_more = limit is not None and len(ids) > limit
+    ids = ids[:limit] if limit is not None else ids
+    by_id = {p.id: p for p in Patient.query.filter(Patient.id.in_(ids)).all()} if ids else {}
+    patients = [by_id[i] for i in ids if i in by_id]
+    
+    if not paged:
+        return jsonify([p.to_dict() for p in patients])
+    
+    response = jsonify({
+        'items': [p.to_dict() for p in patients],
+        'next_cursor': encode_search_cursor(offset + limit) if has_more else None,
+        'limit': limit
+    })
+    if request.args.get('with_total', '').lower() in ('true', '1'):
+        response.headers['X-Total-Count'] = str(search_index.count(search))
+    return response
+
+@app.route('/api/patients/autocomplete', methods=['GET'])
+def autocomplete_patients():
+    """Prefix lookup on name or phone for the reception search box"""
+    query = request.args.get('q', '').strip()
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    return jsonify(autocomplete_index.search(query, limit))
+
+@app.route('/api/patients/count', methods=['GET'])
+def count_patients():
+    """Get total number of patients"""
+    count = db.session.query(db.func.count(Patient.id)).scalar()
+    return jsonify({'count': count})
+
+@app.route('/api/patients/lookup', methods=['POST'])
+def lookup_patients():
+    """Resolve a batch of patient names ("prenom nom") to patient ids
+
+    Names are compared after normalize_text() on both sides (case and
+    accents folded in Python, SQLite only folds ASCII). The whole batch is
+    resolved in a single pass over one query; an exact match wins over a
+    partial one, ties go to the first patient by nom.
+    """
+    data = request.get_json() or {}
+    names = [n for n in data.get('names', []) if isinstance(n, str) and n.strip()]
+    keys = {n: normalize_text(n) for n in names}
+    wanted = set(k for k in keys.values() if k)
+    exact, partial = {}, {}
+
+    if wanted:
+        rows = db.session.query(Patient.id, Patient.prenom, Patient.nom)\
+                         .order_by(Patient.nom).yield_per(1000)
+        for patient_id, prenom, nom in rows:
+            full_name = normalize_text(f"{prenom} {nom}")
+            if full_name in wanted:
+                exact.setdefault(full_name, patient_id)
+            for key in wanted:
+                if key not in partial and key in full_name:
+                    partial[key] = patient_id
+            wanted.difference_update(exact)
+            if not wanted:
+                break
+
+    matches = {n: exact.get(k, partial.get(k)) for n, k in keys.items()}
+    return jsonify({'matches': matches})
+
+@app.route('/api/patients/import', methods=['POST'])
+def import_patients():
+    """Bulk import patients from CSV or NDJSON
+
+    Body: the file itself, or a multipart form with a `file` field.
+    ?format=csv (default) | ndjson. Returns inserted/failed counts and per-line errors.
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+    stream = upload.stream if upload else request.stream
+    
+    report = importer.import_stream(stream, fmt)
+    return jsonify(report), 200 if report['inserted'] or not report['failed'] else 400
+
+@app.route('/api/patients/export', methods=['GET'])
+def export_patients_file():
+    """Stream all patients as CSV (default) or NDJSON"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = app.response_class(
+        stream_with_context(export_patients(Patient.query.order_by(Patient.id), fmt)),
+        mimetype=mimetype
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=patients.{fmt}'
+    return response
 
 @app.route('/api/patients/<patient_id>', methods=['GET'])
 def get_patient(patient_id):
-    """Get specific patient with details"""
-    patient = Patient.query.get_or_404(patient_id)
-    return jsonify(patient.to_dict(include_details=True))
+    """Get specific patient with details
+
+    ?fields=id,nom,...            scalar fields to return (default: all)
+    ?include=observations,...     related collections (default: all, empty for none)
+    ?observations_limit=N         latest N observations (default 50)
+    """
+    fields = [f for f in request.args.get('fields', '').split(',') if f] or None
+    include = request.args.get('include')
+    include = PATIENT_INCLUDES if include is None else [i for i in include.split(',') if i in PATIENT_INCLUDES]
+    
+    query = Patient.query
+    if 'ordonnances' in include:
+        query = query.options(selectinload(Patient.ordonnances))
+    patient = query.filter_by(id=patient_id).first_or_404()
+    
+    observations = None
+    data_extra = {}
+    if 'observations' in include:
+        limit = min(max(request.args.get('observations_limit', DEFAULT_OBSERVATIONS_LIMIT, type=int), 1),
+                    MAX_OBSERVATIONS_LIMIT)
+        # Latest first; one extra row tells whether older observations exist
+        observations = Observation.query.filter_by(patient_id=patient_id) \
+            .order_by(Observation.date.desc(), Observation.id.desc()) \
+            .limit(limit + 1).all()
+        data_extra['observations_truncated'] = len(observations) > limit
+        observations = observations[:limit]
+    
+    data = patient.to_dict(fields=fields, include=include, observations=observations)
+    data.update(data_extra)
+    return jsonify(data)
 
 @app.route('/api/patients', methods=['POST'])
 def create_patient():
@@ -143,26 +422,31 @@ def create_patient():
     photo = request.files.get('photo')
     filename = "default.jpg"
     
-    if photo and photo.filename:
-        filename = secure_filename(photo.filename)
-        photo.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+    try:
+        date_naissance = parse_date(data['date_naissance'])
+    except ValueError:
+        return jsonify({'error': 'date_naissance must be YYYY-MM-DD'}), 400
     
-    # Generate new patient ID
-    last_patient = Patient.query.order_by(Patient.id.desc()).first()
-    if last_patient and last_patient.id.startswith('PT'):
+    if photo and photo.filename:
         try:
-            num = int(last_patient.id[2:])
-            new_id = f"PT{num+1:03d}"
-        except:
-            new_id = "PT001"
-    else:
-        new_id = "PT001"
+            filename = photo_store.save(photo.stream)
+        except InvalidPhoto as e:
+            return jsonify({'error': str(e)}), 400
+    try:
+        return insert_patient(data, date_naissance, filename)
+    finally:
+        # The stored photo can be released again once the row is committed
+        photo_store.unpin(filename)
+
+def insert_patient(data, date_naissance, filename):
+    """Insert the patient of a create request and commit"""
+    new_id = id_allocator.next_id('patient')
     
     patient = Patient(
         id=new_id,
         nom=data['nom'],
         prenom=data['prenom'],
-        date_naissance=data['date_naissance'],
+        date_naissance=date_naissance,
         sexe=data['sexe'],
         telephone=data['telephone'],
         email=data.get('email'),
@@ -184,15 +468,35 @@ def update_patient(patient_id):
     patient = Patient.query.get_or_404(patient_id)
     data = request.form
     
+    if data.get('date_naissance'):
+        try:
+            patient.date_naissance = parse_date(data['date_naissance'])
+        except ValueError:
+            return jsonify({'error': 'date_naissance must be YYYY-MM-DD'}), 400
+    
     photo = request.files.get('photo')
+    filename = None
     if photo and photo.filename:
-        filename = secure_filename(photo.filename)
-        photo.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+        try:
+            filename = photo_store.save(photo.stream)
+        except InvalidPhoto as e:
+            return jsonify({'error': str(e)}), 400
+    try:
+        return apply_patient_update(patient, data, filename)
+    finally:
+        if filename:
+            photo_store.unpin(filename)
+
+def apply_patient_update(patient, data, filename):
+    """Apply an update request (and its stored photo, if any) and commit"""
+    old_photo = None
+    if filename:
+        if filename != patient.photo:
+            old_photo = patient.photo
         patient.photo = filename
     
     patient.nom = data.get('nom', patient.nom)
     patient.prenom = data.get('prenom', patient.prenom)
-    patient.date_naissance = data.get('date_naissance', patient.date_naissance)
     patient.sexe = data.get('sexe', patient.sexe)
     patient.telephone = data.get('telephone', patient.telephone)
     patient.email = data.get('email', patient.email)
@@ -202,6 +506,7 @@ def update_patient(patient_id):
     patient.maladies = data.get('maladies', patient.maladies)
     
     db.session.commit()
+    release_photo(old_photo)
     
     return jsonify(patient.to_dict())
 
@@ -209,18 +514,95 @@ def update_patient(patient_id):
 def delete_patient(patient_id):
     """Delete patient"""
     patient = Patient.query.get_or_404(patient_id)
-    
-    if patient.photo != 'default.jpg':
-        path = os.path.join(app.config['UPLOAD_FOLDER'], patient.photo)
-        if os.path.exists(path):
-            os.remove(path)
+    photo = patient.photo
     
     db.session.delete(patient)
     db.session.commit()
+    release_photo(photo)
     
     return jsonify({'message': 'Patient deleted successfully'})
 
+# ==================== PHOTOS ====================
+def release_photo(filename):
+    """Delete a photo file once no patient references it (files are shared by content)"""
+    if not filename or filename == 'default.jpg':
+        return
+    photo_store.release(filename, lambda: Patient.query.filter_by(photo=filename).first() is not None)
+
+@app.route('/api/photos/<filename>', methods=['GET'])
+def get_photo(filename):
+    """Serve a photo or its thumbnail (?size=64|256) with ETag and Range support"""
+    filename = secure_filename(filename)
+    size = request.args.get('size', type=int)
+    if size:
+        try:
+            path = photo_store.thumbnail(filename, size)
+        except OSError:
+            path = None
+    else:
+        path = photo_store.path(filename)
+    if not path or not os.path.exists(path):
+        return jsonify({'error': 'Photo not found'}), 404
+    
+    # Content-addressed names never change content: cache for a year
+    digest = os.path.splitext(filename)[0]
+    content_addressed = len(digest) == 64
+    response = send_file(path, conditional=True, max_age=PHOTO_MAX_AGE,
+                         etag=f"{digest}-{size or 'full'}" if content_addressed else True)
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = content_addressed
+    return response
+
 # ==================== OBSERVATIONS API ====================
+def encode_observation_cursor(obs):
+    """Keyset cursor for the (date DESC, id DESC) timeline ordering"""
+    raw = json.dumps([obs.date, obs.id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+@app.route('/api/patients/<patient_id>/observations', methods=['GET'])
+def get_observations(patient_id):
+    """Observation timeline, newest first
+
+    ?limit=N (default 50), ?cursor=<next_cursor>, ?date_from=YYYY-MM-DD, ?date_to=YYYY-MM-DD
+    """
+    if db.session.query(Patient.id).filter_by(id=patient_id).first() is None:
+        return jsonify({'error': 'Resource not found'}), 404
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    # Served by ix_observation_patient_date
+    query = Observation.query.filter(Observation.patient_id == patient_id)
+    if request.args.get('date_from'):
+        query = query.filter(Observation.date >= request.args['date_from'])
+    if request.args.get('date_to'):
+        query = query.filter(Observation.date <= request.args['date_to'])
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            last_date, last_id = decode_cursor(cursor)
+        except (ValueError, TypeError, KeyError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(
+            db.or_(
+                Observation.date < last_date,
+                db.and_(Observation.date == last_date, Observation.id < last_id)
+            )
+        )
+    
+    observations = query.order_by(Observation.date.desc(), Observation.id.desc()).limit(limit + 1).all()
+    has_more = len(observations) > limit
+    observations = observations[:limit]
+    
+    return jsonify({
+        'items': [obs.to_dict() for obs in observations],
+        'next_cursor': encode_observation_cursor(observations[-1]) if has_more else None,
+        'limit': limit
+    })
+
 @app.route('/api/patients/<patient_id>/observations', methods=['POST'])
 def add_observation(patient_id):
     """Add observation to patient"""
@@ -241,11 +623,7 @@ def add_observation(patient_id):
 
 # ==================== ORDONNANCES API ====================
 def generate_ordonnance_id():
-    last_ord = Ordonnance.query.order_by(Ordonnance.id.desc()).first()
-    if not last_ord:
-        return "ORD001"
-    last_num = int(last_ord.id.replace("ORD", ""))
-    return f"ORD{last_num + 1:03d}"
+    return id_allocator.next_id('ordonnance')
 
 @app.route('/api/patients/<patient_id>/ordonnances', methods=['POST'])
 def create_ordonnance(patient_id):
@@ -265,69 +643,139 @@ def create_ordonnance(patient_id):
     db.session.add(ordon)
     db.session.commit()
     
+    if PDF_PRERENDER:
+        pdf_executor.submit(prerender_ordonnance_pdf, ord_id, patient_id, {
+            'patient_name': f"{patient.prenom} {patient.nom}",
+            'age': compute_age(patient.date_naissance),
+            'date': ordon.date,
+            'medicaments': ordon.medicaments,
+        })
+    
     return jsonify(ordon.to_dict()), 201
 
-@app.route('/api/patients/<patient_id>/ordonnances/<ord_id>/pdf', methods=['GET'])
-def get_ordonnance_pdf(patient_id, ord_id):
-    """Generate PDF for ordonnance"""
-    patient = Patient.query.get_or_404(patient_id)
-    ordonnance = Ordonnance.query.get_or_404(ord_id)
+def get_doctor_name(patient_id):
+    """Doctor of the patient's last RDV, cached DOCTOR_NAME_TTL seconds (LRU, DOCTOR_NAME_CACHE_SIZE entries)"""
+    with doctor_name_lock:
+        cached = doctor_name_cache.get(patient_id)
+        if cached and time.monotonic() - cached[1] < DOCTOR_NAME_TTL:
+            doctor_name_cache.move_to_end(patient_id)
+            return cached[0]
     
-    # Get doctor name from RDV service
     doctor_name = "Dr. Médecin Généraliste"
     try:
-        response = requests.get(f"{RDV_SERVICE_URL}/api/last_rdv/{patient_id}", timeout=3)
+        response = service_client.get(f"{RDV_SERVICE_URL}/api/last_rdv/{patient_id}", timeout=(2, 3))
         if response.status_code == 200:
             data = response.json()
             nom_medecin = data.get('nom_medecin')
             if nom_medecin:
                 doctor_name = f"Dr. {nom_medecin}"
-    except:
-        pass
-    
-    # Calculate age
-    date_naiss = datetime.strptime(patient.date_naissance, "%Y-%m-%d")
-    today = datetime.today()
-    age = today.year - date_naiss.year
-    if (today.month, today.day) < (date_naiss.month, date_naiss.day):
-        age -= 1
-    
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=80)
-    styles = getSampleStyleSheet()
-    elements = []
-    
-    elements.append(Paragraph("ORDONNANCE MÉDICALE", styles['Title']))
-    elements.append(Spacer(1, 30))
-    
-    elements.append(Paragraph(
-        f"<b>Patient :</b> {patient.prenom} {patient.nom} ({age} ans)",
-        styles['Normal']
-    ))
-    elements.append(Paragraph(f"<b>Date :</b> {ordonnance.date}", styles['Normal']))
-    elements.append(Paragraph(f"Médecin : {doctor_name}", styles['Normal']))
-    elements.append(Spacer(1, 40))
-    
-    meds = [m.strip() for m in ordonnance.medicaments.split('\n') if m.strip()]
-    data = [["Médicament / Posologie"]] + [[m] for m in meds]
-    
-    table = Table(data, colWidths=[480])
-    table.setStyle([
-        ('GRID', (0, 0), (-1, -1), 0.7, colors.grey),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('LEFTPADDING', (0, 1), (-1, -1), 15),
-        ('TOPPADDING', (0, 1), (-1, -1), 15),
-    ])
-    
-    elements.append(table)
-    doc.build(elements)
-    
-    buffer.seek(0)
-    response = make_response(buffer.getvalue())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = (
-        f'attachment; filename=Ordonnance_{patient.nom}_{ordonnance.id}.pdf'
-    )
+    except requests.exceptions.RequestException:
+        return doctor_name  # not cached, retried on the next download
+    
+    with doctor_name_lock:
+        doctor_name_cache[patient_id] = (doctor_name, time.monotonic())
+        doctor_name_cache.move_to_end(patient_id)
+        while len(doctor_name_cache) > DOCTOR_NAME_CACHE_SIZE:
+            doctor_name_cache.popitem(last=False)
+    return doctor_name
+
+def ordonnance_pdf_inputs(patient, ordonnance):
+    """Everything the rendered document depends on"""
+    return {
+        'patient_name': f"{patient.prenom} {patient.nom}",
+        'age': compute_age(patient.date_naissance),
+        'date': ordonnance.date,
+        'doctor_name': get_doctor_name(patient.id),
+        'medicaments': ordonnance.medicaments,
+    }
+
+def prerender_ordonnance_pdf(ord_id, patient_id, inputs):
+    """Render and cache an ordonnance ahead of its first download"""
+    try:
+        inputs = dict(inputs, doctor_name=get_doctor_name(patient_id))
+        key = pdf_cache_key(ord_id, **inputs)
+        if pdf_cache.get(key) is None:
+            pdf_cache.put(key, render_ordonnance_pdf(**inputs))
+    except Exception as e:
+        print(f"PDF pre-render failed for {ord_id}: {e}")
+
+@app.route('/api/patients/<patient_id>/ordonnances/<ord_id>/pdf', methods=['GET'])
+def get_ordonnance_pdf(patient_id, ord_id):
+    """Generate PDF for ordonnance"""
+    patient = Patient.query.get_or_404(patient_id)
+    ordonnance = Ordonnance.query.get_or_404(ord_id)
+    
+    inputs = ordonnance_pdf_inputs(patient, ordonnance)
+    key = pdf_cache_key(ordonnance.id, **inputs)
+    etag = f'"{key}"'
+    
+    if etag in request.headers.get('If-None-Match', ''):
+        response = make_response('', 304)
+    else:
+        pdf = pdf_cache.get(key)
+        if pdf is None:
+            pdf = render_ordonnance_pdf(**inputs)
+            try:
+                pdf_cache.put(key, pdf)
+            except OSError as e:
+                print(f"PDF cache write failed: {e}")
+        response = make_response(pdf)
+        response.headers['Content-Type'] = 'application/pdf'
+        response.headers['Content-Length'] = str(len(pdf))
+        response.headers['Content-Disposition'] = (
+            f'attachment; filename=Ordonnance_{patient.nom}_{ordonnance.id}.pdf'
+        )
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/api/ordonnances/export', methods=['GET'])
+def export_ordonnances():
+    """Export ordonnances as a streamed ZIP or one merged PDF
+
+    ?patient_id=PT001 and/or ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
+    ?format=zip (default) | pdf
+    """
+    patient_id = request.args.get('patient_id')
+    date_from = request.args.get('date_from')
+    date_to = request.args.get('date_to')
+    export_format = request.args.get('format', 'zip')
+    if not (patient_id or date_from or date_to):
+        return jsonify({'error': 'patient_id or a date range is required'}), 400
+    if export_format not in ('zip', 'pdf'):
+        return jsonify({'error': 'format must be zip or pdf'}), 400
+    
+    query = db.session.query(Ordonnance, Patient).join(Patient, Ordonnance.patient_id == Patient.id)
+    if patient_id:
+        query = query.filter(Ordonnance.patient_id == patient_id)
+    if date_from:
+        query = query.filter(Ordonnance.date >= date_from)
+    if date_to:
+        query = query.filter(Ordonnance.date <= date_to)
+    rows = query.order_by(Ordonnance.date, Ordonnance.id).limit(MAX_EXPORT_DOCUMENTS + 1).all()
+    if not rows:
+        return jsonify({'error': 'No ordonnance matches'}), 404
+    if len(rows) > MAX_EXPORT_DOCUMENTS:
+        return jsonify({'error': f'More than {MAX_EXPORT_DOCUMENTS} ordonnances, narrow the range'}), 400
+    if export_format == 'pdf' and len(rows) > MAX_MERGED_PDF_DOCUMENTS:
+        return jsonify({'error': f'More than {MAX_MERGED_PDF_DOCUMENTS} ordonnances for one PDF, '
+                                 f'use format=zip or narrow the range'}), 400
+    
+    # Render inputs are gathered here; the generator then needs no app context
+    jobs = [
+        (f"Ordonnance_{patient.nom}_{ordonnance.id}.pdf", ordonnance.id, ordonnance_pdf_inputs(patient, ordonnance))
+        for ordonnance, patient in rows
+    ]
+    documents = render_documents(jobs, pdf_cache, get_render_pool(PDF_EXPORT_WORKERS),
+                                 ordered=(export_format == 'pdf'))
+    name = f"Ordonnances_{patient_id or 'export'}_{datetime.today().strftime('%Y%m%d')}"
+    
+    if export_format == 'pdf':
+        response = app.response_class(stream_merged_pdf(documents), mimetype='application/pdf')
+        response.headers['Content-Disposition'] = f'attachment; filename={name}.pdf'
+    else:
+        response = app.response_class(stream_zip(documents), mimetype='application/zip')
+        response.headers['Content-Disposition'] = f'attachment; filename={name}.zip'
     return response
 
 # ==================== EXTERNAL SERVICE INTEGRATION ====================
@@ -335,11 +783,11 @@ def get_ordonnance_pdf(patient_id, ord_id):
 def get_patient_last_rdv(patient_id):
     """Get patient's last RDV from RDV service"""
     try:
-        response = requests.get(f"{RDV_SERVICE_URL}/api/last_rdv/{patient_id}", timeout=3)
+        response = service_client.get(f"{RDV_SERVICE_URL}/api/last_rdv/{patient_id}", timeout=(2, 3))
         if response.status_code == 200:
             return jsonify(response.json())
         return jsonify({"last_rdv": None})
-    except:
+    except requests.exceptions.RequestException:
         return jsonify({"last_rdv": None})
 
 @app.route('/api/config', methods=['GET'])
@@ -350,6 +798,57 @@ def get_config():
         'doctors_url': DOCTORS_SERVICE_URL
     })
 
+# ==================== CLI ====================
+@app.cli.command('import-patients')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default=None,
+              help='Defaults to the file extension')
+def import_patients_command(path, fmt):
+    """Bulk import patients from a CSV or NDJSON file."""
+    fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    with open(path, 'rb') as f:
+        report = importer.import_stream(f, fmt)
+    click.echo(f"{report['inserted']} patients imported, {report['failed']} rejected")
+    for error in report['errors']:
+        click.echo(f"  line {error['line']}: {error['error']}")
+
+@app.cli.command('export-patients')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='csv')
+def export_patients_command(path, fmt):
+    """Export all patients to a CSV or NDJSON file."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in export_patients(Patient.query.order_by(Patient.id), fmt):
+            f.write(chunk)
+    click.echo(f"Patients exported to {path}")
+
+def hot_query_checks():
+    """Queries shaped like the hot routes, and the index each one must use"""
+    return {
+        'get_all_patients': (Patient.query.order_by(Patient.nom, Patient.id).limit(DEFAULT_PAGE_SIZE),
+                             'ix_patient_nom_id'),
+        'get_observations': (Observation.query.filter(Observation.patient_id == 'PT001')
+                             .order_by(Observation.date.desc(), Observation.id.desc()).limit(DEFAULT_PAGE_SIZE),
+                             'ix_observation_patient_date'),
+        'get_patient (ordonnances)': (Ordonnance.query.filter(Ordonnance.patient_id == 'PT001'),
+                                      'ix_ordonnance_patient_date'),
+        'export_ordonnances': (Ordonnance.query.filter(Ordonnance.patient_id == 'PT001')
+                               .order_by(Ordonnance.date, Ordonnance.id),
+                               'ix_ordonnance_patient_date'),
+    }
+
+@app.cli.command('check-indexes')
+def check_indexes_command():
+    """Check with EXPLAIN QUERY PLAN that each hot query uses its index."""
+    results = check_query_plans(db.session, hot_query_checks())
+    if not results:
+        click.echo("Query plan check only runs on SQLite")
+        return
+    for name, ok, plan in results:
+        click.echo(f"{'OK  ' if ok else 'FAIL'} {name}: {' | '.join(plan)}")
+    if not all(ok for _, ok, _ in results):
+        raise SystemExit(1)
+
 # ==================== ERROR HANDLERS ====================
 @app.errorhandler(404)
 def not_found(error):
@@ -361,4 +860,6 @@ def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
+    # Export workers are forked here, before the server starts any thread
+    start_render_pool(PDF_EXPORT_WORKERS)
     app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
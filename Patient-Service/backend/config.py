@@ -1,4 +1,11 @@
 import os
+import sys
+
+# Shared HTTP client (shared/http_client.py): copied to /opt/shared by the
+# Docker images (PYTHONPATH), taken straight from the repository locally
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared')
+if os.path.isdir(SHARED_DIR) and SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
 
 # Check if running in Docker
 USE_DOCKER = os.getenv('USE_DOCKER', 'false').lower() == 'true'
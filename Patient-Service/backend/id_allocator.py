@@ -0,0 +1,82 @@
+import threading
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+
+class IdAllocator:
+    """Block-based id allocator backed by the `id_sequence` table.
+
+    Each worker reserves `block_size` numbers at a time with a single atomic
+    UPDATE on its own connection/transaction, then hands them out from memory.
+    Workers never share a block, so concurrent inserts cannot collide; numbers
+    left in a block when a worker stops are simply skipped.
+    """
+
+    def __init__(self, db, block_size=50):
+        self.db = db
+        self.block_size = block_size
+        self._sequences = {}    # name -> (prefix, width)
+        self._blocks = {}       # name -> [next, end)
+        self._lock = threading.Lock()
+
+    def register(self, name, prefix, width=6):
+        self._sequences[name] = (prefix, width)
+
+    def setup(self, seeds):
+        """Create the table and seed missing sequences.
+
+        `seeds` maps a sequence name to a callable returning the existing ids
+        it must not reuse; it is only called for sequences not yet seeded.
+        """
+        with self.db.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS id_sequence ("
+                "name VARCHAR(30) PRIMARY KEY, next_value INTEGER NOT NULL)"
+            ))
+            seeded = {row[0] for row in conn.execute(text("SELECT name FROM id_sequence"))}
+        for name, existing_ids in seeds.items():
+            if name in seeded:
+                continue
+            prefix = self._sequences[name][0]
+            start = max((self.parse(prefix, i) for i in existing_ids()), default=0) + 1
+            try:
+                with self.db.engine.begin() as conn:
+                    conn.execute(text("INSERT INTO id_sequence (name, next_value) VALUES (:name, :start)"),
+                                 {'name': name, 'start': start})
+            except IntegrityError:
+                pass  # seeded concurrently by another worker
+
+    @staticmethod
+    def parse(prefix, value):
+        """Numeric part of an id like PT001 (0 if it does not match)."""
+        if not value or not value.startswith(prefix) or not value[len(prefix):].isdigit():
+            return 0
+        return int(value[len(prefix):])
+
+    def _reserve(self, name, count):
+        # The UPDATE takes the row (SQLite: database) write lock until commit,
+        # so the SELECT below reads this transaction's own increment.
+        with self.db.engine.begin() as conn:
+            conn.execute(text("UPDATE id_sequence SET next_value = next_value + :n WHERE name = :name"),
+                         {'n': count, 'name': name})
+            end = conn.execute(text("SELECT next_value FROM id_sequence WHERE name = :name"),
+                               {'name': name}).scalar()
+        return end - count, end
+
+    def next_number(self, name):
+        with self._lock:
+            start, end = self._blocks.get(name, (0, 0))
+            if start >= end:
+                start, end = self._reserve(name, self.block_size)
+            self._blocks[name] = (start + 1, end)
+            return start
+
+    def next_id(self, name):
+        prefix, width = self._sequences[name]
+        return f"{prefix}{self.next_number(name):0{width}d}"
+
+    def reserve_ids(self, name, count):
+        """`count` fresh ids at once (bulk inserts), outside the worker block."""
+        prefix, width = self._sequences[name]
+        start, end = self._reserve(name, count)
+        return [f"{prefix}{n:0{width}d}" for n in range(start, end)]
@@ -0,0 +1,44 @@
+"""add patient and observation indexes
+
+Revision ID: 3f2a9c1d7b40
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Tables are created by db.create_all(); this revision only adds the indexes
+# that create_all() does not add to tables that already exist.
+INDEXES = [
+    ('ix_patient_nom_id', 'patient', ['nom', 'id']),
+    ('ix_observation_patient_date', 'observation', ['patient_id', 'date']),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        existing = _existing_indexes(table)
+        if existing is not None and name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        existing = _existing_indexes(table)
+        if existing and name in existing:
+            op.drop_index(name, table_name=table)
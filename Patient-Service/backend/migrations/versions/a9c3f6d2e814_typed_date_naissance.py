@@ -0,0 +1,82 @@
+"""typed date_naissance
+
+Revision ID: a9c3f6d2e814
+Revises: c47d0e8f5a13
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c3f6d2e814'
+down_revision = 'c47d0e8f5a13'
+branch_labels = None
+depends_on = None
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d')
+
+patient = sa.table(
+    'patient',
+    sa.column('id', sa.String),
+    sa.column('date_naissance', sa.Date),
+)
+
+
+def _parse(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _normalize_values(bind):
+    """Rewrite date_naissance as 'YYYY-MM-DD' (SQLite storage format of DATE).
+
+    Every value is checked before anything is written: an unreadable date
+    would break every read of the typed column, so the upgrade stops and
+    lists the patients to fix (the column is NOT NULL, there is no value to
+    fall back to).
+    """
+    rows = bind.execute(sa.text("SELECT id, date_naissance FROM patient")).all()
+    parsed = [(patient_id, value, _parse(value)) for patient_id, value in rows]
+    bad = [f"{patient_id} ({value!r})" for patient_id, value, date in parsed if date is None]
+    if bad:
+        raise RuntimeError(
+            f"{len(bad)} patient(s) with an unreadable date_naissance, fix them "
+            f"(YYYY-MM-DD) and rerun the upgrade: {', '.join(bad[:50])}"
+            + (" ..." if len(bad) > 50 else "")
+        )
+    for patient_id, _, date in parsed:
+        bind.execute(patient.update().where(patient.c.id == patient_id).values(date_naissance=date))
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table('patient'):
+        return
+    if bind.dialect.name == 'sqlite':
+        # Declared types are only affinities in SQLite, and a batch table copy
+        # would CAST the strings to numbers: only the stored values change.
+        _normalize_values(bind)
+        return
+    columns = {c['name']: c['type'] for c in inspector.get_columns('patient')}
+    if isinstance(columns['date_naissance'], sa.Date):
+        return
+    _normalize_values(bind)
+    op.alter_column('patient', 'date_naissance', existing_type=sa.String(length=20), type_=sa.Date(),
+                    existing_nullable=False, postgresql_using='date_naissance::date')
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if bind.dialect.name == 'sqlite' or not inspector.has_table('patient'):
+        return
+    op.alter_column('patient', 'date_naissance', existing_type=sa.Date(), type_=sa.String(length=20),
+                    existing_nullable=False, postgresql_using='date_naissance::text')
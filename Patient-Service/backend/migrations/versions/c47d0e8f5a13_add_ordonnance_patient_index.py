@@ -0,0 +1,31 @@
+"""add ordonnance patient index
+
+Revision ID: c47d0e8f5a13
+Revises: 3f2a9c1d7b40
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47d0e8f5a13'
+down_revision = '3f2a9c1d7b40'
+branch_labels = None
+depends_on = None
+
+
+def _has_index(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return inspector.has_table(table) and name in {i['name'] for i in inspector.get_indexes(table)}
+
+
+def upgrade():
+    if not _has_index('ordonnance', 'ix_ordonnance_patient_date'):
+        op.create_index('ix_ordonnance_patient_date', 'ordonnance', ['patient_id', 'date'])
+
+
+def downgrade():
+    if _has_index('ordonnance', 'ix_ordonnance_patient_date'):
+        op.drop_index('ix_ordonnance_patient_date', table_name='ordonnance')
@@ -0,0 +1,141 @@
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pypdf import PdfReader, PdfWriter
+from ordonnance_pdf import pdf_cache_key, render_ordonnance_pdf
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def start_render_pool(max_workers=None, method=None):
+    """Create the process pool shared by exports (ReportLab rendering is CPU-bound).
+
+    The server entry point calls it before serving: with 'fork' the workers
+    are launched right away (they only need ordonnance_pdf, not a re-import
+    of the app), while the process has no other thread yet; forking a
+    threaded process can leave a lock held in the child.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if method is None:
+                method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers or min(4, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context(method)
+            )
+            if method == 'fork':
+                # The first submit launches every worker
+                _pool.submit(os.getpid).result()
+        return _pool
+
+
+def get_render_pool(max_workers=None):
+    """The pool started by the entry point.
+
+    Processes started another way (flask CLI, WSGI server) create it on
+    first use with 'spawn', which is safe once threads are running.
+    """
+    if _pool is None:
+        return start_render_pool(max_workers, method='spawn')
+    return _pool
+
+
+def render_documents(jobs, cache, pool, window=8, ordered=False):
+    """Yield (filename, pdf bytes) for each job.
+
+    `jobs` are (filename, ord_id, inputs) tuples. Cached documents are read
+    from `cache`, the others rendered in `pool` with at most `window` renders
+    in flight, so memory stays bounded whatever the number of jobs. Results
+    come in completion order, or in job order when `ordered` is set.
+    """
+    in_flight = deque()     # [future or cached bytes, filename, key]
+
+    def finish(entry):
+        result, filename, key = entry
+        if isinstance(result, bytes):
+            return filename, result
+        pdf = result.result()
+        try:
+            cache.put(key, pdf)
+        except OSError as e:
+            print(f"PDF cache write failed: {e}")
+        return filename, pdf
+
+    def next_done():
+        if not ordered:
+            futures = [e[0] for e in in_flight if not isinstance(e[0], bytes)]
+            if len(futures) == len(in_flight):
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                entry = next(e for e in in_flight if e[0] in done)
+            else:
+                entry = next(e for e in in_flight if isinstance(e[0], bytes))
+            in_flight.remove(entry)
+            return finish(entry)
+        return finish(in_flight.popleft())
+
+    for filename, ord_id, inputs in jobs:
+        key = pdf_cache_key(ord_id, **inputs)
+        pdf = cache.get(key)
+        if pdf is None:
+            pdf = pool.submit(render_ordonnance_pdf, **inputs)
+        in_flight.append([pdf, filename, key])
+        if len(in_flight) >= window:
+            yield next_done()
+    while in_flight:
+        yield next_done()
+
+
+class _ChunkWriter(io.RawIOBase):
+    """Unseekable sink for zipfile: bytes written are collected for the next yield."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(documents):
+    """ZIP archive of `documents`, yielded chunk by chunk as they are added."""
+    sink = _ChunkWriter()
+    # PDFs are already compressed: store them as is
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for filename, pdf in documents:
+            archive.writestr(filename, pdf)
+            yield sink.take()
+    yield sink.take()
+
+
+def stream_merged_pdf(documents, chunk_size=64 * 1024):
+    """One PDF with the pages of every document.
+
+    The cross-reference table comes last in a PDF, so the merged file is
+    assembled in memory before the first byte is sent (callers cap the number
+    of documents); it is then yielded in chunks.
+    """
+    writer = PdfWriter()
+    for _, pdf in documents:
+        writer.append(PdfReader(io.BytesIO(pdf)))
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    buffer.seek(0)
+    while True:
+        chunk = buffer.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
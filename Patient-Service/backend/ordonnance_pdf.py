@@ -0,0 +1,146 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from datetime import date, datetime
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib import colors
+
+# Built once: getSampleStyleSheet() creates a new stylesheet on every call
+STYLES = getSampleStyleSheet()
+
+TABLE_STYLE = [
+    ('GRID', (0, 0), (-1, -1), 0.7, colors.grey),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('LEFTPADDING', (0, 1), (-1, -1), 15),
+    ('TOPPADDING', (0, 1), (-1, -1), 15),
+]
+
+
+def compute_age(date_naissance, today=None):
+    date_naiss = date_naissance
+    if isinstance(date_naiss, str):
+        date_naiss = datetime.strptime(date_naiss, "%Y-%m-%d").date()
+    today = today or date.today()
+    age = today.year - date_naiss.year
+    if (today.month, today.day) < (date_naiss.month, date_naiss.day):
+        age -= 1
+    return age
+
+
+def render_ordonnance_pdf(patient_name, age, date, doctor_name, medicaments):
+    """Render an ordonnance to PDF bytes (pure: same inputs, same document)."""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=80, invariant=1)
+    elements = []
+
+    elements.append(Paragraph("ORDONNANCE MÉDICALE", STYLES['Title']))
+    elements.append(Spacer(1, 30))
+
+    elements.append(Paragraph(f"<b>Patient :</b> {patient_name} ({age} ans)", STYLES['Normal']))
+    elements.append(Paragraph(f"<b>Date :</b> {date}", STYLES['Normal']))
+    elements.append(Paragraph(f"Médecin : {doctor_name}", STYLES['Normal']))
+    elements.append(Spacer(1, 40))
+
+    meds = [m.strip() for m in medicaments.split('\n') if m.strip()]
+    data = [["Médicament / Posologie"]] + [[m] for m in meds]
+
+    table = Table(data, colWidths=[480])
+    table.setStyle(TABLE_STYLE)
+
+    elements.append(table)
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def pdf_cache_key(ord_id, patient_name, age, date, doctor_name, medicaments):
+    """Content address of a rendered ordonnance: hash of everything it shows."""
+    raw = "\x1f".join(str(v) for v in (ord_id, patient_name, age, date, doctor_name, medicaments))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class PdfCache:
+    """Size-bounded on-disk cache of rendered PDFs, keyed by content hash.
+
+    Files are written atomically (temp file + rename), so concurrent workers
+    can share the directory. Reads bump the file mtime. A running byte total
+    is kept per process; the directory is only listed when that total passes
+    `max_bytes` (then the least recently used files are evicted down to 90%
+    of it, so the next writes do not list it again) or every `rescan_every`
+    writes, to account for the other workers' files.
+    """
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024, rescan_every=256):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rescan_every = rescan_every
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total = self._scan()[1]
+        self._puts = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        path = self._path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._total += len(data) - replaced
+            self._puts += 1
+            due = self._total > self.max_bytes or self._puts % self.rescan_every == 0
+        if due:
+            self._evict()
+
+    def _scan(self):
+        files = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pdf'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return files, total
+
+    def _evict(self):
+        with self._lock:
+            files, total = self._scan()
+            if total > self.max_bytes:
+                target = self.max_bytes * 9 // 10
+                for _, size, path in sorted(files):
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    if total <= target:
+                        break
+            self._total = total
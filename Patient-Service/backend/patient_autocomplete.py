@@ -0,0 +1,161 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from sqlalchemy import event
+from patient_search import normalize_text, phone_digits
+
+
+class PatientAutocomplete:
+    """In-memory sorted prefix index for reception lookups.
+
+    Each patient is indexed under "prenom nom", "nom prenom" and the digits of
+    the phone number; a lookup is a bisect plus a short forward scan. Committed
+    ORM writes update the index incrementally; a periodic rebuild picks up
+    writes made by other workers.
+    """
+
+    def __init__(self, db, model, refresh_interval=120):
+        self.db = db
+        self.model = model
+        self.refresh_interval = refresh_interval
+        self._entries = []      # sorted (key, patient_id)
+        self._records = {}      # patient_id -> (display name, telephone, keys)
+        self._lock = threading.RLock()
+        self._built_at = 0.0
+        self._rebuilding = False
+
+    # --- Index maintenance ---
+
+    @staticmethod
+    def _keys(patient):
+        get = patient.get if isinstance(patient, dict) else lambda k: getattr(patient, k, None)
+        prenom, nom = normalize_text(get('prenom')), normalize_text(get('nom'))
+        keys = {f"{prenom} {nom}".strip(), f"{nom} {prenom}".strip(), phone_digits(get('telephone'))}
+        return [k for k in keys if k]
+
+    def _remove_locked(self, patient_id):
+        record = self._records.pop(patient_id, None)
+        if record is None:
+            return
+        for key in record[2]:
+            i = bisect_left(self._entries, (key, patient_id))
+            if i < len(self._entries) and self._entries[i] == (key, patient_id):
+                del self._entries[i]
+
+    def _add_locked(self, patient):
+        get = patient.get if isinstance(patient, dict) else lambda k: getattr(patient, k, None)
+        patient_id = get('id')
+        self._remove_locked(patient_id)
+        keys = self._keys(patient)
+        self._records[patient_id] = (f"{get('prenom')} {get('nom')}", get('telephone'), keys)
+        for key in keys:
+            insort(self._entries, (key, patient_id))
+
+    def add_many(self, patients):
+        patients = list(patients)
+        with self._lock:
+            if len(patients) < 100:
+                for patient in patients:
+                    self._add_locked(patient)
+                return
+            # Large batches (bulk import): append then re-sort once
+            for patient in patients:
+                self._remove_locked(patient['id'] if isinstance(patient, dict) else patient.id)
+            for patient in patients:
+                get = patient.get if isinstance(patient, dict) else lambda k, p=patient: getattr(p, k, None)
+                keys = self._keys(patient)
+                self._records[get('id')] = (f"{get('prenom')} {get('nom')}", get('telephone'), keys)
+                self._entries.extend((key, get('id')) for key in keys)
+            self._entries.sort()
+
+    def remove(self, patient_id):
+        with self._lock:
+            self._remove_locked(patient_id)
+
+    def rebuild(self):
+        """Full rebuild from the database (needs an app context)."""
+        rows = self.db.session.query(
+            self.model.id, self.model.nom, self.model.prenom, self.model.telephone
+        ).all()
+        entries, records = [], {}
+        for row in rows:
+            patient = row._asdict()
+            keys = self._keys(patient)
+            records[patient['id']] = (f"{patient['prenom']} {patient['nom']}", patient['telephone'], keys)
+            entries.extend((key, patient['id']) for key in keys)
+        entries.sort()
+        with self._lock:
+            self._entries, self._records = entries, records
+            self._built_at = time.monotonic()
+
+    def _background_rebuild(self, app):
+        try:
+            with app.app_context():
+                self.rebuild()
+        except Exception as e:
+            print(f"Autocomplete rebuild failed: {e}")
+        finally:
+            self._rebuilding = False
+
+    def _maybe_refresh(self, app):
+        with self._lock:
+            if self._rebuilding or time.monotonic() - self._built_at < self.refresh_interval:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._background_rebuild, args=(app,), daemon=True).start()
+
+    def setup(self, app):
+        """Initial build and incremental sync on committed ORM writes."""
+        self.app = app
+        self.rebuild()
+        event.listen(self.db.session, 'after_flush', self._collect_changes)
+        event.listen(self.db.session, 'after_commit', self._apply_changes)
+        event.listen(self.db.session, 'after_rollback', self._discard_changes)
+
+    def _collect_changes(self, session, flush_context):
+        changes = session.info.setdefault('autocomplete_changes', {})
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, self.model):
+                changes[obj.id] = {'id': obj.id, 'nom': obj.nom, 'prenom': obj.prenom, 'telephone': obj.telephone}
+        for obj in session.deleted:
+            if isinstance(obj, self.model):
+                changes[obj.id] = None
+
+    def _apply_changes(self, session):
+        changes = session.info.pop('autocomplete_changes', None)
+        if not changes:
+            return
+        with self._lock:
+            for patient_id, patient in changes.items():
+                if patient is None:
+                    self._remove_locked(patient_id)
+                else:
+                    self._add_locked(patient)
+
+    def _discard_changes(self, session):
+        session.info.pop('autocomplete_changes', None)
+
+    # --- Query ---
+
+    def search(self, query, limit=10):
+        """Top `limit` patients whose name or phone starts with `query`."""
+        self._maybe_refresh(self.app)
+        digits = phone_digits(query)
+        normalized = normalize_text(query)
+        prefix = digits if digits and len(digits) >= len(normalized.replace(' ', '')) else normalized
+        if not prefix:
+            return []
+
+        results, seen = [], set()
+        with self._lock:
+            i = bisect_left(self._entries, (prefix,))
+            while i < len(self._entries) and len(results) < limit:
+                key, patient_id = self._entries[i]
+                if not key.startswith(prefix):
+                    break
+                if patient_id not in seen:
+                    seen.add(patient_id)
+                    name, telephone, _ = self._records[patient_id]
+                    results.append({'id': patient_id, 'nom_complet': name, 'telephone': telephone})
+                i += 1
+        return results
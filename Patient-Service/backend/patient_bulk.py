@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
+
+FIELDS = ['id', 'nom', 'prenom', 'date_naissance', 'sexe', 'telephone', 'email',
+          'adresse', 'groupe_sanguin', 'allergies', 'maladies', 'photo']
+REQUIRED = ['nom', 'prenom', 'date_naissance', 'sexe', 'telephone', 'adresse', 'groupe_sanguin']
+IMPORTED = [f for f in FIELDS if f not in ('id', 'photo')]
+FORMATS = ('csv', 'ndjson')
+
+# Errors listed in a report; further ones are only counted
+MAX_REPORTED_ERRORS = 1000
+
+
+def iter_records(stream, fmt):
+    """Yield (line number, dict or None, parse error) from a binary stream."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Expected a JSON object"
+            continue
+        yield line_no, record, None
+
+
+def validate_record(record, model):
+    """Cleaned column values, or raise ValueError with the reason."""
+    columns = model.__table__.columns
+    values = {}
+    for field in IMPORTED:
+        value = record.get(field)
+        value = str(value).strip() if value is not None else ''
+        if not value:
+            if field in REQUIRED:
+                raise ValueError(f"Missing {field}")
+            values[field] = None
+            continue
+        max_length = getattr(columns[field].type, 'length', None)
+        if max_length and len(value) > max_length:
+            raise ValueError(f"{field} longer than {max_length} characters")
+        values[field] = value
+    try:
+        values['date_naissance'] = datetime.strptime(values['date_naissance'], "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("date_naissance must be YYYY-MM-DD")
+    values['photo'] = 'default.jpg'
+    return values
+
+
+class PatientImporter:
+    """Batched patient import.
+
+    Rows are validated as they are read and inserted `batch_size` at a time in
+    one transaction (executemany). Ids come from the id allocator in one
+    reservation per batch; the search and autocomplete indexes are updated
+    with each batch.
+    """
+
+    def __init__(self, db, model, allocator, search_index=None, autocomplete_index=None, batch_size=1000):
+        self.db = db
+        self.model = model
+        self.allocator = allocator
+        self.search_index = search_index
+        self.autocomplete_index = autocomplete_index
+        self.batch_size = batch_size
+
+    def _insert(self, batch, report):
+        ids = self.allocator.reserve_ids('patient', len(batch))
+        records = [dict(values, id=patient_id) for (_, values), patient_id in zip(batch, ids)]
+        try:
+            with self.db.engine.begin() as conn:
+                conn.execute(self.model.__table__.insert(), records)
+                if self.search_index is not None:
+                    self.search_index.index_patients(conn, records)
+        except SQLAlchemyError as e:
+            for line_no, _ in batch:
+                self._error(report, line_no, f"Database error: {e.__class__.__name__}")
+            return
+        if self.autocomplete_index is not None:
+            self.autocomplete_index.add_many(records)
+        report['inserted'] += len(records)
+
+    @staticmethod
+    def _error(report, line_no, message):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line_no, 'error': message})
+
+    def import_stream(self, stream, fmt):
+        report = {'inserted': 0, 'failed': 0, 'errors': []}
+        batch = []
+        for line_no, record, error in iter_records(stream, fmt):
+            if error is None:
+                try:
+                    batch.append((line_no, validate_record(record, self.model)))
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                self._error(report, line_no, error)
+            if len(batch) >= self.batch_size:
+                self._insert(batch, report)
+                batch = []
+        if batch:
+            self._insert(batch, report)
+        return report
+
+
+def export_patients(query, fmt, batch_size=1000):
+    """Yield the patients of `query` as CSV or NDJSON text, one batch at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(FIELDS)
+    count = 0
+    for patient in query.yield_per(batch_size):
+        if writer:
+            writer.writerow([getattr(patient, f) or '' for f in FIELDS])
+        else:
+            buffer.write(json.dumps({f: getattr(patient, f) for f in FIELDS}, ensure_ascii=False, default=str) + '\n')
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,167 @@
+import unicodedata
+from sqlalchemy import event, text
+
+# Arabic letter variants folded onto a single form (alif, ta marbuta, ya, ...)
+_ARABIC_FOLD = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ة': 'ه', 'ى': 'ي', 'ؤ': 'و', 'ئ': 'ي',
+    'ـ': '',
+})
+
+# The trigram tokenizer cannot match terms shorter than this
+MIN_TERM_LENGTH = 3
+
+
+def normalize_text(value):
+    """Lowercase, strip accents (é → e) and Arabic diacritics, fold letter variants."""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', str(value))
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    value = value.translate(_ARABIC_FOLD).lower()
+    return ' '.join(value.split())
+
+
+def phone_digits(value):
+    return ''.join(c for c in str(value or '') if c.isdigit())
+
+
+def patient_document(patient):
+    """Searchable text of a patient (model instance or mapping)."""
+    get = patient.get if isinstance(patient, dict) else lambda k: getattr(patient, k, None)
+    return normalize_text(
+        f"{get('prenom') or ''} {get('nom') or ''} {get('id') or ''} "
+        f"{get('telephone') or ''} {phone_digits(get('telephone'))}"
+    )
+
+
+class PatientSearchIndex:
+    """FTS5 (trigram) shadow index over patient name, phone and id.
+
+    Each `patient_fts` row carries the patient id in an UNINDEXED column
+    (the implicit rowid of `patient` is not stable: its primary key is a
+    string, so VACUUM may renumber it). ORM writes keep it in sync through
+    mapper events, inside the same transaction. On databases without FTS5
+    (or not SQLite) `available` stays False and callers use the LIKE search.
+    """
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+        self.table = model.__tablename__
+        self.available = False
+
+    def setup(self):
+        engine = self.db.engine
+        if engine.dialect.name != 'sqlite':
+            return False
+        try:
+            with engine.begin() as conn:
+                columns = [row[1] for row in conn.execute(text("PRAGMA table_info(patient_fts)"))]
+                if columns and 'patient_id' not in columns:
+                    # Index keyed on the patient rowid (older layout): rebuilt below
+                    conn.execute(text("DROP TABLE patient_fts"))
+                conn.execute(text(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS patient_fts "
+                    "USING fts5(patient_id UNINDEXED, content, tokenize='trigram')"
+                ))
+        except Exception as e:
+            print(f"FTS5 index unavailable, falling back to LIKE search: {e}")
+            return False
+
+        if not event.contains(self.model, 'after_insert', self._after_insert):
+            event.listen(self.model, 'after_insert', self._after_insert)
+            event.listen(self.model, 'after_update', self._after_update)
+            event.listen(self.model, 'before_delete', self._before_delete)
+        self.available = True
+
+        with engine.begin() as conn:
+            indexed = conn.execute(text("SELECT count(*) FROM patient_fts")).scalar()
+            total = conn.execute(text(f"SELECT count(*) FROM {self.table}")).scalar()
+        if indexed != total:
+            self.rebuild()
+        return True
+
+    # --- Sync ---
+
+    @staticmethod
+    def _params(patient):
+        return {'id': patient['id'] if isinstance(patient, dict) else patient.id,
+                'content': patient_document(patient)}
+
+    def _insert(self, connection, patient):
+        connection.execute(
+            text("INSERT INTO patient_fts(patient_id, content) VALUES (:id, :content)"),
+            self._params(patient)
+        )
+
+    def _delete(self, connection, patient_id):
+        connection.execute(text("DELETE FROM patient_fts WHERE patient_id = :id"), {'id': patient_id})
+
+    def _after_insert(self, mapper, connection, target):
+        self._insert(connection, target)
+
+    def _after_update(self, mapper, connection, target):
+        self._delete(connection, target.id)
+        self._insert(connection, target)
+
+    def _before_delete(self, mapper, connection, target):
+        self._delete(connection, target.id)
+
+    def index_patients(self, connection, patients):
+        """Index rows written without the ORM (bulk inserts)."""
+        if not self.available:
+            return
+        params = [self._params(p) for p in patients]
+        if params:
+            connection.execute(
+                text("INSERT INTO patient_fts(patient_id, content) VALUES (:id, :content)"), params
+            )
+
+    def rebuild(self, batch_size=1000):
+        with self.db.engine.begin() as conn:
+            conn.execute(text("DELETE FROM patient_fts"))
+            rows = conn.execute(text(f"SELECT id, nom, prenom, telephone FROM {self.table}")).mappings()
+            batch = []
+            for row in rows:
+                batch.append(dict(row))
+                if len(batch) >= batch_size:
+                    self.index_patients(conn, batch)
+                    batch = []
+            self.index_patients(conn, batch)
+
+    # --- Query ---
+
+    @staticmethod
+    def match_expression(query):
+        """FTS5 expression (AND of quoted terms), or None if no term is long enough."""
+        terms = [t for t in normalize_text(query).split() if len(t) >= MIN_TERM_LENGTH]
+        if not terms:
+            return None
+        return ' '.join('"' + t.replace('"', '""') + '"' for t in terms)
+
+    def search_ids(self, query, limit=None, offset=0):
+        """Patient ids ranked by relevance (bm25), or None to fall back to LIKE."""
+        if not self.available:
+            return None
+        expression = self.match_expression(query)
+        if expression is None:
+            return None
+        sql = (f"SELECT p.id FROM patient_fts f JOIN {self.table} p ON p.id = f.patient_id "
+               f"WHERE patient_fts MATCH :q ORDER BY bm25(patient_fts), p.nom, p.id")
+        params = {'q': expression}
+        if limit is not None:
+            sql += " LIMIT :limit OFFSET :offset"
+            params.update(limit=limit, offset=offset)
+        return [row[0] for row in self.db.session.execute(text(sql), params)]
+
+    def count(self, query):
+        """Number of patients matching `query`, or None to fall back to LIKE."""
+        if not self.available:
+            return None
+        expression = self.match_expression(query)
+        if expression is None:
+            return None
+        return self.db.session.execute(
+            text("SELECT count(*) FROM patient_fts WHERE patient_fts MATCH :q"), {'q': expression}
+        ).scalar()
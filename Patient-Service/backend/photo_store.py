@@ -0,0 +1,141 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import Counter
+from PIL import Image, UnidentifiedImageError
+
+# Pillow format -> stored extension
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+
+class InvalidPhoto(ValueError):
+    pass
+
+
+class PhotoStore:
+    """Patient photos stored under the sha256 of their content.
+
+    Two uploads of the same image share one file; names never collide. Each
+    photo gets JPEG thumbnails in `<folder>/thumbs/<size>/` (generated on
+    upload, or lazily for photos stored before this layout).
+
+    A saved name stays pinned until `unpin()`: `release()` never deletes it
+    meanwhile, so an upload deduplicated onto a file another request is
+    releasing keeps its file until its row is committed.
+    """
+
+    def __init__(self, folder, thumb_sizes=(64, 256), chunk_size=64 * 1024):
+        self.folder = folder
+        self.thumb_sizes = tuple(thumb_sizes)
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._pins = Counter()
+        for size in self.thumb_sizes:
+            os.makedirs(self._thumb_dir(size), exist_ok=True)
+
+    def _thumb_dir(self, size):
+        return os.path.join(self.folder, 'thumbs', str(size))
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def thumbnail_path(self, name, size):
+        return os.path.join(self._thumb_dir(size), os.path.splitext(name)[0] + '.jpg')
+
+    def save(self, stream):
+        """Store an uploaded stream; returns the stored (pinned) file name.
+
+        The image is fully decoded and its thumbnails rendered before anything
+        is stored: a corrupt image or a decompression bomb raises InvalidPhoto.
+        """
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.upload')
+        thumbs = {}
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+            try:
+                with Image.open(tmp_path) as image:
+                    extension = EXTENSIONS.get(image.format)
+                    image.verify()
+                if extension is None:
+                    raise InvalidPhoto("Unsupported image format")
+                # verify() does not decode the pixels
+                with Image.open(tmp_path) as image:
+                    pixels = image.convert('RGB')
+            except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+                raise InvalidPhoto(f"Not a valid image: {e}")
+            for size in self.thumb_sizes:
+                thumbs[size] = self._write_thumbnail(pixels, size)
+
+            name = f"{digest.hexdigest()}.{extension}"
+            with self._lock:
+                if os.path.exists(self.path(name)):
+                    os.unlink(tmp_path)     # same content already stored
+                else:
+                    os.replace(tmp_path, self.path(name))
+                for size, thumb_path in thumbs.items():
+                    os.replace(thumb_path, self.thumbnail_path(name, size))
+                self._pins[name] += 1
+        except BaseException:
+            for path in [tmp_path] + list(thumbs.values()):
+                if os.path.exists(path):
+                    os.unlink(path)
+            raise
+        return name
+
+    def unpin(self, name):
+        """The row referencing `name` is committed (or abandoned): it may be released again."""
+        with self._lock:
+            if self._pins[name] > 1:
+                self._pins[name] -= 1
+            else:
+                self._pins.pop(name, None)
+
+    def _write_thumbnail(self, image, size):
+        """Render `image` (RGB) at `size` into a temporary file of the thumbnail folder."""
+        thumb = image.copy()
+        thumb.thumbnail((size, size))
+        fd, tmp_path = tempfile.mkstemp(dir=self._thumb_dir(size), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                thumb.save(f, 'JPEG', quality=85, optimize=True)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
+
+    def _make_thumbnail(self, name, size):
+        target = self.thumbnail_path(name, size)
+        if os.path.exists(target):
+            return target
+        with Image.open(self.path(name)) as image:
+            tmp_path = self._write_thumbnail(image.convert('RGB'), size)
+        os.replace(tmp_path, target)
+        return target
+
+    def thumbnail(self, name, size):
+        """Path of a thumbnail, generated if missing (None if the photo is missing)."""
+        if size not in self.thumb_sizes or not os.path.exists(self.path(name)):
+            return None
+        return self._make_thumbnail(name, size)
+
+    def release(self, name, is_referenced):
+        """Delete a photo unless it is pinned or `is_referenced()` is true.
+
+        Both checks and the deletion run under the lock `save()` takes to store
+        a file, so a concurrent upload of the same bytes cannot lose it.
+        """
+        with self._lock:
+            if self._pins[name] or is_referenced():
+                return False
+            for path in [self.path(name)] + [self.thumbnail_path(name, s) for s in self.thumb_sizes]:
+                if os.path.exists(path):
+                    os.remove(path)
+            return True
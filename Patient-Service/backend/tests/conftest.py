@@ -0,0 +1,54 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope='session')
+def patient_app(tmp_path_factory):
+    """The app module, bound to a scratch SQLite database and upload folder."""
+    workdir = tmp_path_factory.mktemp('patient-service')
+    os.environ['DATABASE_URI'] = f"sqlite:///{workdir / 'patients.db'}"
+    os.environ['PDF_CACHE_DIR'] = str(workdir / 'pdf_cache')
+    os.environ['PDF_PRERENDER'] = 'false'
+    # Nothing listens there: calls to the other services fail fast
+    os.environ['RDV_URL'] = os.environ['DOCTORS_URL'] = 'http://127.0.0.1:9'
+    # static/uploads is relative to the working directory
+    os.chdir(workdir)
+    import app as patient_app
+    patient_app.app.config['TESTING'] = True
+    return patient_app
+
+
+@pytest.fixture
+def client(patient_app):
+    return patient_app.app.test_client()
+
+
+@pytest.fixture
+def add_patient(patient_app):
+    """Insert patients through the ORM; they are deleted after the test."""
+    created = []
+
+    def add(prenom, nom, **fields):
+        values = dict(id=f"PT{900000 + len(created)}", prenom=prenom, nom=nom,
+                      date_naissance=date(1990, 1, 1), sexe='F', telephone='0550000000',
+                      adresse='Alger', groupe_sanguin='O+')
+        values.update(fields)
+        with patient_app.app.app_context():
+            patient_app.db.session.add(patient_app.Patient(**values))
+            patient_app.db.session.commit()
+        created.append(values['id'])
+        return values['id']
+
+    yield add
+    with patient_app.app.app_context():
+        for patient_id in created:
+            patient = patient_app.db.session.get(patient_app.Patient, patient_id)
+            if patient is not None:
+                patient_app.db.session.delete(patient)
+        patient_app.db.session.commit()
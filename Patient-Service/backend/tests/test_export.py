@@ -0,0 +1,39 @@
+import io
+import zipfile
+
+import ordonnance_export
+
+
+def add_ordonnances(client, patient_id, count):
+    for i in range(count):
+        response = client.post(f'/api/patients/{patient_id}/ordonnances',
+                               json={'medicaments': f'Paracétamol 500 mg x{i + 1}'})
+        assert response.status_code in (200, 201)
+
+
+def test_import_does_not_start_the_render_pool(patient_app):
+    # flask db upgrade and the other CLI commands import the app
+    assert ordonnance_export._pool is None
+
+
+def test_zip_export_renders_every_ordonnance(patient_app, client, add_patient):
+    patient_id = add_patient('Rania', 'Zerrouki')
+    add_ordonnances(client, patient_id, 3)
+
+    response = client.get('/api/ordonnances/export', query_string={'patient_id': patient_id})
+
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(response.data))
+    assert len(archive.namelist()) == 3
+    assert all(archive.read(name).startswith(b'%PDF') for name in archive.namelist())
+
+
+def test_merged_pdf_is_capped(patient_app, client, add_patient, monkeypatch):
+    patient_id = add_patient('Walid', 'Hamdi')
+    add_ordonnances(client, patient_id, 3)
+    monkeypatch.setattr(patient_app, 'MAX_MERGED_PDF_DOCUMENTS', 2)
+
+    response = client.get('/api/ordonnances/export', query_string={'patient_id': patient_id, 'format': 'pdf'})
+
+    assert response.status_code == 400
+    assert 'format=zip' in response.get_json()['error']
@@ -0,0 +1,26 @@
+def lookup(client, *names):
+    response = client.post('/api/patients/lookup', json={'names': list(names)})
+    assert response.status_code == 200
+    return response.get_json()['matches']
+
+
+def test_lookup_folds_case_and_accents(client, add_patient):
+    zoe = add_patient('Zoé', 'Éric')
+    nael = add_patient('Naël', 'Bénali')
+
+    matches = lookup(client, 'zoé éric', 'ZOÉ  ÉRIC', 'nael benali', 'Inconnu Total')
+
+    assert matches == {'zoé éric': zoe, 'ZOÉ  ÉRIC': zoe, 'nael benali': nael, 'Inconnu Total': None}
+
+
+def test_lookup_prefers_exact_over_partial_match(client, add_patient):
+    add_patient('Amélie', 'Aït Ali')
+    exact = add_patient('Amélie', 'Ali')
+
+    assert lookup(client, 'amélie ali') == {'amélie ali': exact}
+
+
+def test_lookup_partial_match_with_accents(client, add_patient):
+    patient_id = add_patient('Hélène', 'Kaci')
+
+    assert lookup(client, 'hélène') == {'hélène': patient_id}
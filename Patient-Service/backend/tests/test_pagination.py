@@ -0,0 +1,30 @@
+def test_default_response_is_a_bare_list(client, add_patient):
+    ids = {add_patient('Lina', 'Brahimi'), add_patient('Yanis', 'Amrani')}
+
+    response = client.get('/api/patients')
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert isinstance(body, list)
+    assert ids <= {p['id'] for p in body}
+    assert client.get('/api/patients?all=true').get_json() == body
+
+
+def test_limit_opts_into_cursor_pages(client, add_patient):
+    ids = [add_patient('Sami', nom) for nom in ('Adel', 'Bouzid', 'Cherif')]
+
+    first = client.get('/api/patients?limit=2').get_json()
+    assert [p['id'] for p in first['items']] == ids[:2]
+    assert first['limit'] == 2 and first['next_cursor']
+
+    second = client.get(f"/api/patients?limit=2&cursor={first['next_cursor']}").get_json()
+    assert [p['id'] for p in second['items']] == ids[2:]
+    assert second['next_cursor'] is None
+
+
+def test_search_follows_the_same_shapes(client, add_patient):
+    patient_id = add_patient('Meriem', 'Ouali')
+
+    assert [p['id'] for p in client.get('/api/patients?q=Ouali').get_json()] == [patient_id]
+    page = client.get('/api/patients?q=Ouali&limit=10').get_json()
+    assert [p['id'] for p in page['items']] == [patient_id]
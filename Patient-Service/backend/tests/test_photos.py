@@ -0,0 +1,76 @@
+import io
+import os
+
+from PIL import Image
+
+from photo_store import PhotoStore
+
+PATIENT_FORM = {'nom': 'Photo', 'prenom': 'Test', 'date_naissance': '1990-01-01', 'sexe': 'F',
+                'telephone': '0550000000', 'adresse': 'Alger', 'groupe_sanguin': 'O+'}
+
+
+def image_bytes(fmt='JPEG', size=(120, 80), color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def stored_files(folder):
+    return sorted(name for name in os.listdir(folder) if os.path.isfile(os.path.join(folder, name)))
+
+
+def upload(client, data, filename='photo.jpg'):
+    return client.post('/api/patients', data=dict(PATIENT_FORM, photo=(io.BytesIO(data), filename)),
+                       content_type='multipart/form-data')
+
+
+def test_truncated_image_is_rejected_without_leftovers(patient_app, client):
+    folder = patient_app.photo_store.folder
+    before = stored_files(folder)
+    buffer = io.BytesIO()
+    Image.frombytes('RGB', (200, 200), os.urandom(200 * 200 * 3)).save(buffer, 'JPEG')
+    data = buffer.getvalue()
+
+    # Headers intact (verify() passes), pixel data cut short
+    response = upload(client, data[:len(data) * 3 // 4])
+
+    assert response.status_code == 400
+    assert stored_files(folder) == before
+
+
+def test_decompression_bomb_is_rejected(patient_app, client, monkeypatch):
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 1000)
+    folder = patient_app.photo_store.folder
+    before = stored_files(folder)
+
+    response = upload(client, image_bytes(size=(200, 200)))
+
+    assert response.status_code == 400
+    assert stored_files(folder) == before
+
+
+def test_upload_stores_photo_and_thumbnails(patient_app, client):
+    response = upload(client, image_bytes(color=(10, 120, 10)))
+
+    assert response.status_code == 201
+    patient = response.get_json()
+    store = patient_app.photo_store
+    assert os.path.exists(store.path(patient['photo']))
+    assert all(os.path.exists(store.thumbnail_path(patient['photo'], s)) for s in store.thumb_sizes)
+    assert client.delete(f"/api/patients/{patient['id']}").status_code == 200
+    assert not os.path.exists(store.path(patient['photo']))
+
+
+def test_release_keeps_a_pinned_photo(tmp_path):
+    store = PhotoStore(str(tmp_path))
+    name = store.save(io.BytesIO(image_bytes()))
+    store.unpin(name)
+
+    # Same bytes uploaded again while the previous owner releases the file
+    assert store.save(io.BytesIO(image_bytes())) == name
+    assert not store.release(name, lambda: False)
+    assert os.path.exists(store.path(name))
+
+    store.unpin(name)
+    assert store.release(name, lambda: False)
+    assert not os.path.exists(store.path(name))
@@ -0,0 +1,60 @@
+from sqlalchemy import text
+
+
+def search(client, query, **params):
+    response = client.get('/api/patients', query_string=dict(q=query, **params))
+    assert response.status_code == 200
+    return response
+
+
+def ids(response):
+    body = response.get_json()
+    return [p['id'] for p in (body['items'] if isinstance(body, dict) else body)]
+
+
+def test_search_survives_renumbered_rowids(patient_app, client, add_patient):
+    add_patient('Yasmine', 'Haddad')
+    karim = add_patient('Karim', 'Ouali')
+    with patient_app.app.app_context():
+        # What VACUUM is allowed to do to a table without INTEGER PRIMARY KEY
+        patient_app.db.session.execute(text("UPDATE patient SET rowid = rowid + 1000"))
+        patient_app.db.session.commit()
+        patient_app.db.session.execute(text("VACUUM"))
+
+    assert ids(search(client, 'ouali')) == [karim]
+
+
+def test_search_follows_updates_and_deletes(patient_app, client, add_patient):
+    patient_id = add_patient('Sofiane', 'Brahimi')
+    with patient_app.app.app_context():
+        patient = patient_app.db.session.get(patient_app.Patient, patient_id)
+        patient.nom = 'Belkacem'
+        patient_app.db.session.commit()
+
+    assert ids(search(client, 'brahimi')) == []
+    assert ids(search(client, 'belkacem')) == [patient_id]
+
+    assert client.delete(f'/api/patients/{patient_id}').status_code == 200
+    assert ids(search(client, 'belkacem')) == []
+
+
+def test_search_total_counts_matches(client, add_patient):
+    for i in range(3):
+        add_patient('Lina', f'Meddour{i}')
+    add_patient('Lina', 'Saidi')
+
+    response = search(client, 'meddour', limit=2, with_total='true')
+
+    assert len(ids(response)) == 2
+    assert response.headers['X-Total-Count'] == '3'
+
+
+def test_old_rowid_index_is_rebuilt(patient_app, add_patient):
+    patient_id = add_patient('Nadia', 'Cherif')
+    index = patient_app.search_index
+    with patient_app.app.app_context():
+        with patient_app.db.engine.begin() as conn:
+            conn.execute(text("DROP TABLE patient_fts"))
+            conn.execute(text("CREATE VIRTUAL TABLE patient_fts USING fts5(content, tokenize='trigram')"))
+        index.setup()
+        assert index.search_ids('cherif') == [patient_id]
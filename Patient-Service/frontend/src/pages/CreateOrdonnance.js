@@ -119,7 +119,7 @@ function CreateOrdonnance() {
       <div className="ordonnance-header">
         <div className="patient-info">
           <img
-            src={`/uploads/${patient.photo}`}
+            src={`/api/photos/${patient.photo}?size=256`}
             alt={patient.prenom}
             className="patient-photo"
             onError={(e) => { e.target.src = '/uploads/default.jpg'; }}
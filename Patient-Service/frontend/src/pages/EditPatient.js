@@ -43,7 +43,7 @@ function EditPatient() {
         maladies: patient.maladies || '',
         photo: null
       });
-      setPhotoPreview(`/uploads/${patient.photo}`);
+      setPhotoPreview(`/api/photos/${patient.photo}?size=256`);
     } catch (err) {
       setError('Erreur lors du chargement du patient');
       console.error(err);
@@ -96,7 +96,7 @@ function PatientDetail() {
       <div className="patient-header">
         <div className="patient-info">
           <img
-            src={`/uploads/${patient.photo}`}
+            src={`/api/photos/${patient.photo}?size=256`}
             className="patient-photo"
             alt={`${patient.prenom} ${patient.nom}`}
             onError={(e) => { e.target.src = '/uploads/default.jpg'; }}
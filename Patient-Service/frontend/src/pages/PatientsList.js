@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { Link } from 'react-router-dom';
+import { Link, useNavigate } from 'react-router-dom';
 import { patientsAPI } from '../services/api';
 import './PatientsList.css';
 
@@ -9,6 +9,12 @@ function PatientsList() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [lastRdvs, setLastRdvs] = useState({});
+  const [nextCursor, setNextCursor] = useState(null);
+  // Recherche qui a produit la liste affichée (et le curseur)
+  const [activeQuery, setActiveQuery] = useState('');
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [suggestions, setSuggestions] = useState([]);
+  const navigate = useNavigate();
 
   useEffect(() => {
     loadPatients();
@@ -18,10 +24,12 @@ function PatientsList() {
     try {
       setLoading(true);
       const response = await patientsAPI.getAll(search);
-      setPatients(response.data);
+      setPatients(response.data.items);
+      setNextCursor(response.data.next_cursor);
+      setActiveQuery(search);
       
       // Load last RDV for each patient
-      response.data.forEach(patient => {
+      response.data.items.forEach(patient => {
         loadLastRdv(patient.id);
       });
       
@@ -34,6 +42,23 @@ function PatientsList() {
     }
   };
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const response = await patientsAPI.getAll(activeQuery, nextCursor);
+      setPatients(prev => [...prev, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+      response.data.items.forEach(patient => {
+        loadLastRdv(patient.id);
+      });
+    } catch (err) {
+      setError('Erreur lors du chargement des patients');
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const loadLastRdv = async (patientId) => {
     try {
       const response = await patientsAPI.getLastRdv(patientId);
@@ -51,9 +76,24 @@ function PatientsList() {
 
   const handleSearch = (e) => {
     e.preventDefault();
+    setSuggestions([]);
     loadPatients(searchQuery);
   };
 
+  const handleSearchChange = async (value) => {
+    setSearchQuery(value);
+    if (!value.trim()) {
+      setSuggestions([]);
+      return;
+    }
+    try {
+      const response = await patientsAPI.autocomplete(value);
+      setSuggestions(response.data);
+    } catch (err) {
+      setSuggestions([]);
+    }
+  };
+
   const handleDelete = async (id, nom, prenom) => {
     if (window.confirm(`Supprimer ${prenom} ${nom} ?`)) {
       try {
@@ -78,8 +118,18 @@ function PatientsList() {
             type="text"
             placeholder="Rechercher un patient..."
             value={searchQuery}
-            onChange={(e) => setSearchQuery(e.target.value)}
+            onChange={(e) => handleSearchChange(e.target.value)}
           />
+          {suggestions.length > 0 && (
+            <ul className="autocomplete-list">
+              {suggestions.map(s => (
+                <li key={s.id} onMouseDown={() => navigate(`/patients/${s.id}`)}>
+                  <strong>{s.nom_complet}</strong>
+                  <span>{s.telephone}</span>
+                </li>
+              ))}
+            </ul>
+          )}
         </form>
         <Link to="/patients/add" className="btn-primary">
           + Nouveau Patient
@@ -166,6 +216,14 @@ function PatientsList() {
           )}
         </tbody>
       </table>
+
+      {nextCursor && (
+        <div className="load-more">
+          <button onClick={loadMore} className="btn-secondary" disabled={loadingMore}>
+            {loadingMore ? 'Chargement...' : 'Charger plus'}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -35,12 +35,17 @@ api.interceptors.response.use(
 // ========================
 
 export const patientsAPI = {
-  // Get all patients
-  getAll: (searchQuery = '') => {
-    const params = searchQuery ? { q: searchQuery } : {};
+  // Get one page of patients (keyset pagination)
+  getAll: (searchQuery = '', cursor = null, limit = 50) => {
+    const params = { limit };
+    if (searchQuery) params.q = searchQuery;
+    if (cursor) params.cursor = cursor;
     return api.get('/patients', { params });
   },
   
+  // Prefix autocomplete on name / phone (id, nom_complet, telephone only)
+  autocomplete: (query, limit = 8) => api.get('/patients/autocomplete', { params: { q: query, limit } }),
+  
   // Get specific patient
   getById: (id) => api.get(`/patients/${id}`),
   
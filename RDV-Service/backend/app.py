@@ -1,11 +1,20 @@
 from flask import Flask, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from flask_migrate import Migrate
 import requests
 import os
-from config import AUTH_URL, PATIENTS_URL, DOCTORS_URL
+import time
+import click
+from collections import defaultdict
+from sqlalchemy.exc import IntegrityError
+from availability import INACTIVE_STATUTS, DayAgenda, from_minutes, next_free_slots, to_minutes
+from billing_analytics import AnalyticsCache, compute_analytics, load_factures
+from query_plan import check_query_plans
+from config import (AUTH_URL, PATIENTS_URL, DOCTORS_URL, WORKDAY_START, WORKDAY_END,
+                    SLOT_STEP, DEFAULT_DUREE, DOCTORS_CACHE_TTL, ANALYTICS_CHUNK_SIZE)
+from http_client import service_client
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'clinique2025')
@@ -34,10 +43,19 @@ class RendezVous(db.Model):
     nom_patient = db.Column(db.String(100), nullable=False)
     id_medecin = db.Column(db.String(50), nullable=False)
     nom_medecin = db.Column(db.String(100), nullable=True)
-    date_rdv = db.Column(db.String(50), nullable=False)
-    heure = db.Column(db.String(20), nullable=False)
+    date_rdv = db.Column(db.Date, nullable=False)
+    heure = db.Column(db.Time, nullable=False)
     motif = db.Column(db.String(100), nullable=True)
     statut = db.Column(db.String(20), default='En attente')
+    duree = db.Column(db.Integer, nullable=False, default=DEFAULT_DUREE, server_default=str(DEFAULT_DUREE))
+    
+    # Matched to the hot queries below (see `flask check-indexes`)
+    __table_args__ = (
+        db.Index('ix_rendez_vous_date_heure', 'date_rdv', 'heure'),
+        db.Index('ix_rendez_vous_medecin_date', 'id_medecin', 'date_rdv', 'heure'),
+        db.Index('ix_rendez_vous_patient_date', 'id_patient', 'date_rdv'),
+        db.Index('ix_rendez_vous_patient_statut', 'id_patient', 'statut'),
+    )
     
     def to_dict(self):
         return {
@@ -46,12 +64,19 @@ class RendezVous(db.Model):
             'nom_patient': self.nom_patient,
             'id_medecin': self.id_medecin,
             'nom_medecin': self.nom_medecin,
-            'date_rdv': self.date_rdv,
-            'heure': self.heure,
+            'date_rdv': self.date_rdv.isoformat(),
+            'heure': self.heure.strftime('%H:%M'),
             'motif': self.motif,
-            'statut': self.statut
+            'statut': self.statut,
+            'duree': self.duree
         }
 
+class AgendaLock(db.Model):
+    """One row per doctor and day, updated to serialize that day's bookings"""
+    id_medecin = db.Column(db.String(50), primary_key=True)
+    date_rdv = db.Column(db.Date, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
 class Facture(db.Model):
     id_facture = db.Column(db.Integer, primary_key=True)
     numero_facture = db.Column(db.String(50), unique=True, nullable=False)
@@ -63,6 +88,14 @@ class Facture(db.Model):
     statut = db.Column(db.String(20), default='En attente')
     date_creation = db.Column(db.DateTime, default=datetime.utcnow)
     date_paiement = db.Column(db.DateTime, nullable=True)
+    # Bumped on every change, part of the analytics cache key
+    date_modification = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_facture_patient', 'id_patient'),
+        db.Index('ix_facture_statut_paiement', 'statut', 'date_paiement'),
+        db.Index('ix_facture_date_modification', 'date_modification'),
+    )
     
     def to_dict(self):
         return {
@@ -78,17 +111,260 @@ class Facture(db.Model):
             'date_paiement': self.date_paiement.strftime('%Y-%m-%d %H:%M') if self.date_paiement else None
         }
 
+class CompteurFacture(db.Model):
+    """Last invoice number allocated for each year"""
+    __tablename__ = 'compteur_facture'
+    annee = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    dernier_numero = db.Column(db.Integer, nullable=False, default=0)
+
+class RevenuMensuel(db.Model):
+    """Paid invoices rolled up by payment month; (0, 0) holds those without a payment date"""
+    __tablename__ = 'revenu_mensuel'
+    annee = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    mois = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    nb_factures = db.Column(db.Integer, nullable=False, default=0)
+
 with app.app_context():
     db.create_all()
 
+# ========================
+# HOT QUERIES
+# ========================
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+def parse_time(value):
+    return datetime.strptime(value, "%H:%M").time()
+
+def rdv_of_day_query(day):
+    return RendezVous.query.filter(RendezVous.date_rdv == day).order_by(RendezVous.heure)
+
+def rdv_range_query(date_from=None, date_to=None):
+    query = RendezVous.query
+    if date_from:
+        query = query.filter(RendezVous.date_rdv >= date_from)
+    if date_to:
+        query = query.filter(RendezVous.date_rdv <= date_to)
+    return query
+
+def upcoming_rdv_query(now):
+    """Appointments from `now` on, in agenda order"""
+    return RendezVous.query.filter(
+        db.or_(
+            RendezVous.date_rdv > now.date(),
+            db.and_(RendezVous.date_rdv == now.date(), RendezVous.heure >= now.time())
+        )
+    ).order_by(RendezVous.date_rdv, RendezVous.heure)
+
+def last_rdv_query(id_patient):
+    return RendezVous.query.filter_by(id_patient=id_patient).order_by(RendezVous.date_rdv.desc())
+
+def rdv_termine_query(id_patient):
+    return RendezVous.query.filter_by(id_patient=id_patient, statut='Terminé')
+
+def factures_by_patient_query(id_patient):
+    return Facture.query.filter_by(id_patient=id_patient)
+
+def factures_payees_query():
+    return Facture.query.filter_by(statut='Payée')
+
+def last_modification_query():
+    return db.session.query(db.func.max(Facture.date_modification))
+
+def doctor_window_query(doctor_ids, first_day, last_day):
+    """Active bookings of some doctors over a date window"""
+    return db.session.query(
+        RendezVous.id_medecin, RendezVous.date_rdv, RendezVous.id_rdv, RendezVous.heure, RendezVous.duree
+    ).filter(
+        RendezVous.id_medecin.in_(doctor_ids),
+        RendezVous.date_rdv >= first_day,
+        RendezVous.date_rdv <= last_day,
+        db.or_(RendezVous.statut.is_(None), RendezVous.statut.notin_(INACTIVE_STATUTS))
+    )
+
+def hot_query_checks():
+    """Hot queries and the index each one must use"""
+    return {
+        'get_rdv_today': (rdv_of_day_query(date(2025, 1, 1)), 'ix_rendez_vous_date_heure'),
+        'get_all_rdv (range)': (rdv_range_query(date(2025, 1, 1), date(2025, 1, 31))
+                                .order_by(RendezVous.date_rdv.desc()), 'ix_rendez_vous_date_heure'),
+        'get_upcoming_rdv': (upcoming_rdv_query(datetime(2025, 1, 1, 9, 0)).limit(50),
+                             'ix_rendez_vous_date_heure'),
+        'get_last_rdv': (last_rdv_query('PT001').limit(1), 'ix_rendez_vous_patient_date'),
+        'update_facture': (rdv_termine_query('PT001').limit(1), 'ix_rendez_vous_patient_statut'),
+        'booking conflict check': (doctor_window_query(['1'], date(2025, 1, 1), date(2025, 1, 1)),
+                                   'ix_rendez_vous_medecin_date'),
+        'get_free_slots': (doctor_window_query(['1', '2'], date(2025, 1, 1), date(2025, 1, 7)),
+                           'ix_rendez_vous_medecin_date'),
+        'get_factures_by_patient': (factures_by_patient_query('PT001'), 'ix_facture_patient'),
+        'rebuild-revenue': (factures_payees_query(), 'ix_facture_statut_paiement'),
+        'factures_signature': (last_modification_query(), 'ix_facture_date_modification'),
+    }
+
+# ========================
+# INVOICE NUMBERING
+# ========================
+
+def numero_facture_format(annee, numero):
+    return f"INV-{annee}-{numero:03d}"
+
+def last_numero_facture(annee):
+    """Highest sequence already used for `annee` (invoices numbered before the counter existed)"""
+    prefix = numero_facture_format(annee, 0)[:-3]
+    numeros = db.session.query(Facture.numero_facture).filter(Facture.numero_facture.like(f"{prefix}%"))
+    return max((int(n[len(prefix):]) for n, in numeros if n[len(prefix):].isdigit()), default=0)
+
+def allocate_numero_facture(annee):
+    """Next invoice number of the year, in the caller's transaction.
+
+    The counter row stays locked until commit, so concurrent creators get
+    distinct numbers, and a rollback gives the number back (no gaps).
+    """
+    bump = db.update(CompteurFacture).where(CompteurFacture.annee == annee).values(
+        dernier_numero=CompteurFacture.dernier_numero + 1
+    )
+    if db.session.execute(bump).rowcount == 0:
+        try:
+            with db.session.begin_nested():
+                db.session.add(CompteurFacture(annee=annee, dernier_numero=last_numero_facture(annee) + 1))
+        except IntegrityError:
+            db.session.execute(bump)  # created concurrently
+    numero = db.session.query(CompteurFacture.dernier_numero).filter_by(annee=annee).scalar()
+    return numero_facture_format(annee, numero)
+
+# ========================
+# REVENUE ROLLUP
+# ========================
+
+def add_to_revenue(facture, sign=1):
+    """Apply a paid invoice (sign=-1 to remove it) to the monthly rollup, in the caller's transaction"""
+    if facture.date_paiement:
+        annee, mois = facture.date_paiement.year, facture.date_paiement.month
+    else:
+        annee, mois = 0, 0
+    bump = db.update(RevenuMensuel).where(
+        RevenuMensuel.annee == annee, RevenuMensuel.mois == mois
+    ).values(
+        total=RevenuMensuel.total + sign * facture.montant,
+        nb_factures=RevenuMensuel.nb_factures + sign
+    )
+    if db.session.execute(bump).rowcount == 0:
+        try:
+            with db.session.begin_nested():
+                db.session.add(RevenuMensuel(annee=annee, mois=mois,
+                                             total=sign * facture.montant, nb_factures=sign))
+        except IntegrityError:
+            db.session.execute(bump)  # created concurrently
+
+def rebuild_revenue():
+    """Recompute the monthly rollup from the invoices, returns the number of months"""
+    db.session.query(RevenuMensuel).delete()
+    annee = db.func.coalesce(db.extract('year', Facture.date_paiement), 0)
+    mois = db.func.coalesce(db.extract('month', Facture.date_paiement), 0)
+    rows = factures_payees_query().with_entities(
+        annee, mois, db.func.sum(Facture.montant), db.func.count()
+    ).group_by(annee, mois).all()
+    db.session.add_all([
+        RevenuMensuel(annee=int(a), mois=int(m), total=total or 0.0, nb_factures=count)
+        for a, m, total, count in rows
+    ])
+    db.session.commit()
+    return len(rows)
+
+# ========================
+# BILLING ANALYTICS
+# ========================
+
+analytics_cache = AnalyticsCache()
+
+def factures_signature():
+    """Changes whenever an invoice is created, modified or deleted.
+
+    One aggregate per query: SQLite only answers a lone MAX() from the end
+    of an index (primary key, ix_facture_date_modification); the count walks
+    the smallest index, never the table.
+    """
+    return (
+        db.session.query(db.func.count(Facture.id_facture)).scalar(),
+        db.session.query(db.func.max(Facture.id_facture)).scalar(),
+        last_modification_query().scalar(),
+    )
+
+# ========================
+# AVAILABILITY
+# ========================
+
+WORKDAY_START_MIN = to_minutes(datetime.strptime(WORKDAY_START, "%H:%M"))
+WORKDAY_END_MIN = to_minutes(datetime.strptime(WORKDAY_END, "%H:%M"))
+MAX_SLOT_WINDOW_DAYS = 60
+_doctors_cache = {'data': None, 'fetched_at': 0.0}
+
+def parse_duree(value):
+    duree = DEFAULT_DUREE if value in (None, '') else int(value)
+    if not 5 <= duree <= 480:
+        raise ValueError('duree must be between 5 and 480 minutes')
+    return duree
+
+def lock_doctor_day(id_medecin, day):
+    """Serialize the bookings of one doctor on one day until commit/rollback.
+
+    The UPDATE takes a row lock on PostgreSQL and the database write lock on
+    SQLite, so the conflict check and the insert run without interleaving.
+    """
+    bump = db.update(AgendaLock).where(
+        AgendaLock.id_medecin == id_medecin, AgendaLock.date_rdv == day
+    ).values(version=AgendaLock.version + 1)
+    if db.session.execute(bump).rowcount == 0:
+        try:
+            with db.session.begin_nested():
+                db.session.add(AgendaLock(id_medecin=id_medecin, date_rdv=day, version=1))
+        except IntegrityError:
+            db.session.execute(bump)  # created concurrently
+
+def find_booking_conflict(id_medecin, day, heure, duree, exclude_id=None):
+    """Lock the doctor's day and return the id of an overlapping booking, if any"""
+    lock_doctor_day(id_medecin, day)
+    bookings = [(r.id_rdv, r.heure, r.duree) for r in doctor_window_query([id_medecin], day, day)]
+    start = to_minutes(heure)
+    return DayAgenda(bookings).conflict(start, start + duree, exclude_id)
+
+def conflict_response(conflict_id):
+    db.session.rollback()
+    return jsonify({'error': 'Doctor already booked at this time', 'conflict_id': conflict_id}), 409
+
+def doctors_by_speciality(speciality):
+    """{id: name} of the doctors of a speciality (Doctors-Service, cached), None if unreachable"""
+    if _doctors_cache['data'] is None or time.monotonic() - _doctors_cache['fetched_at'] >= DOCTORS_CACHE_TTL:
+        try:
+            response = service_client.get(f"{DOCTORS_URL}/api/doctors", timeout=(2, 3))
+            response.raise_for_status()
+            _doctors_cache.update(data=response.json(), fetched_at=time.monotonic())
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Doctors-Service unavailable: {e}")
+            if _doctors_cache['data'] is None:
+                return None
+    wanted = speciality.strip().lower()
+    return {
+        str(d['id']): d.get('name')
+        for d in _doctors_cache['data']
+        if (d.get('speciality') or '').strip().lower() == wanted
+    }
+
 # ========================
 # RENDEZ-VOUS API ROUTES
 # ========================
 
 @app.route('/api/rdv', methods=['GET'])
 def get_all_rdv():
-    """Get all appointments"""
-    rdvs = RendezVous.query.order_by(RendezVous.date_rdv.desc()).all()
+    """Get all appointments (optionally ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD)"""
+    try:
+        date_from = parse_date(request.args['date_from']) if request.args.get('date_from') else None
+        date_to = parse_date(request.args['date_to']) if request.args.get('date_to') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+    rdvs = rdv_range_query(date_from, date_to).order_by(RendezVous.date_rdv.desc()).all()
     return jsonify([rdv.to_dict() for rdv in rdvs])
 
 @app.route('/api/rdv/<int:id>', methods=['GET'])
@@ -114,13 +390,25 @@ def create_rdv():
     except ValueError:
         return jsonify({'error': 'Invalid date or time format'}), 400
     
+    try:
+        duree = parse_duree(data.get('duree'))
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    id_medecin = str(data.get('id_medecin') or '')
+    if id_medecin:
+        conflict_id = find_booking_conflict(id_medecin, rdv_datetime.date(), rdv_datetime.time(), duree)
+        if conflict_id is not None:
+            return conflict_response(conflict_id)
+    
     rdv = RendezVous(
         id_patient=data['id_patient'],
         nom_patient=data['nom_patient'],
-        id_medecin=data.get('id_medecin', ''),
+        id_medecin=id_medecin,
         nom_medecin=data.get('nom_medecin', ''),
-        date_rdv=data['date_rdv'],
-        heure=data['heure'],
+        date_rdv=rdv_datetime.date(),
+        heure=rdv_datetime.time(),
+        duree=duree,
         motif=data.get('motif', '')
     )
     
@@ -139,29 +427,51 @@ def update_rdv(id):
     if rdv.statut == 'Terminé':
         return jsonify({'error': 'Cannot modify terminated appointment'}), 400
     
+    # Parse date/time changes once
+    try:
+        new_date = parse_date(data['date_rdv']) if 'date_rdv' in data else rdv.date_rdv
+        new_heure = parse_time(data['heure']) if 'heure' in data else rdv.heure
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid date or time format'}), 400
+    
     # Validate date changes
     if 'date_rdv' in data and 'heure' in data:
-        try:
-            new_rdv_datetime = datetime.strptime(f"{data['date_rdv']} {data['heure']}", "%Y-%m-%d %H:%M")
-            current_rdv_datetime = datetime.strptime(f"{rdv.date_rdv} {rdv.heure}", "%Y-%m-%d %H:%M")
-            
-            if new_rdv_datetime < datetime.now() and new_rdv_datetime != current_rdv_datetime:
-                return jsonify({'error': 'Cannot set appointment for past date'}), 400
-            
-            # Check if trying to set status to 'Terminé' for future date
-            if data.get('statut') == 'Terminé' and new_rdv_datetime > datetime.now():
-                return jsonify({'error': 'Cannot mark future appointment as terminated'}), 400
-                
-        except ValueError:
-            return jsonify({'error': 'Invalid date or time format'}), 400
+        new_rdv_datetime = datetime.combine(new_date, new_heure)
+        current_rdv_datetime = datetime.combine(rdv.date_rdv, rdv.heure)
+        
+        if new_rdv_datetime < datetime.now() and new_rdv_datetime != current_rdv_datetime:
+            return jsonify({'error': 'Cannot set appointment for past date'}), 400
+        
+        # Check if trying to set status to 'Terminé' for future date
+        if data.get('statut') == 'Terminé' and new_rdv_datetime > datetime.now():
+            return jsonify({'error': 'Cannot mark future appointment as terminated'}), 400
+    
+    try:
+        new_duree = parse_duree(data['duree']) if 'duree' in data else rdv.duree
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    new_medecin = str(data['id_medecin'] or '') if 'id_medecin' in data else rdv.id_medecin
+    new_statut = data.get('statut', rdv.statut)
+    
+    # Re-check the doctor's agenda when the slot changes (or a cancelled RDV is reactivated);
+    # a plain status change keeps the slot, even if a legacy booking overlaps it
+    reactivated = rdv.statut in INACTIVE_STATUTS and new_statut not in INACTIVE_STATUTS
+    slot_changed = reactivated or (new_date, new_heure, new_duree, new_medecin) != (
+        rdv.date_rdv, rdv.heure, rdv.duree, rdv.id_medecin
+    )
+    if slot_changed and new_medecin and new_statut not in INACTIVE_STATUTS:
+        conflict_id = find_booking_conflict(new_medecin, new_date, new_heure, new_duree, exclude_id=rdv.id_rdv)
+        if conflict_id is not None:
+            return conflict_response(conflict_id)
     
     # Update fields
-    rdv.date_rdv = data.get('date_rdv', rdv.date_rdv)
-    rdv.heure = data.get('heure', rdv.heure)
+    rdv.date_rdv = new_date
+    rdv.heure = new_heure
+    rdv.duree = new_duree
     rdv.motif = data.get('motif', rdv.motif)
-    rdv.id_medecin = data.get('id_medecin', rdv.id_medecin)
+    rdv.id_medecin = new_medecin
     rdv.nom_medecin = data.get('nom_medecin', rdv.nom_medecin)
-    rdv.statut = data.get('statut', rdv.statut)
+    rdv.statut = new_statut
     
     db.session.commit()
     
@@ -201,17 +511,18 @@ def create_facture():
     if not rdv_exists:
         return jsonify({'error': 'Patient must have an existing appointment'}), 400
     
-    # Generate invoice number
-    dernier_numero = Facture.query.count() + 1
-    numero_facture = f"INV-2023-{dernier_numero:03d}"
-    
     montant = float(data['montant'])
     remboursement_pct = float(data.get('remboursement_pct', 0))
     remboursement = montant * (remboursement_pct / 100)
     reste_a_payer = montant - remboursement
     
+    # Generate invoice number
+    now = datetime.utcnow()
+    numero_facture = allocate_numero_facture(now.year)
+    
     facture = Facture(
         numero_facture=numero_facture,
+        date_creation=now,
         id_patient=data['id_patient'],
         nom_patient=data['nom_patient'],
         montant=montant,
@@ -219,8 +530,12 @@ def create_facture():
         reste_a_payer=reste_a_payer,
         statut='Payée' if reste_a_payer == 0 else 'En attente'
     )
+    if facture.statut == 'Payée':
+        facture.date_paiement = now
     
     db.session.add(facture)
+    if facture.statut == 'Payée':
+        add_to_revenue(facture)
     db.session.commit()
     
     return jsonify(facture.to_dict()), 201
@@ -237,10 +552,7 @@ def update_facture(id):
     
     # Check if trying to mark as paid without terminated appointment
     if data.get('statut') == 'Payée':
-        rdv_termine = RendezVous.query.filter_by(
-            id_patient=facture.id_patient, 
-            statut='Terminé'
-        ).first()
+        rdv_termine = rdv_termine_query(facture.id_patient).first()
         if not rdv_termine:
             return jsonify({'error': 'Cannot mark as paid without terminated appointment'}), 400
     
@@ -252,10 +564,14 @@ def update_facture(id):
     facture.montant = montant
     facture.remboursement = remboursement
     facture.reste_a_payer = reste_a_payer
-    facture.statut = data.get('statut', facture.statut)
     
     if data.get('statut') == 'Payée' and facture.statut != 'Payée':
         facture.date_paiement = datetime.utcnow()
+    facture.statut = data.get('statut', facture.statut)
+    
+    # Paid invoices cannot be modified, so this is always the transition to paid
+    if facture.statut == 'Payée':
+        add_to_revenue(facture)
     
     db.session.commit()
     
@@ -265,6 +581,8 @@ def update_facture(id):
 def delete_facture(id):
     """Delete invoice"""
     facture = Facture.query.get_or_404(id)
+    if facture.statut == 'Payée':
+        add_to_revenue(facture, sign=-1)
     db.session.delete(facture)
     db.session.commit()
     return jsonify({'message': 'Invoice deleted successfully'})
@@ -276,23 +594,73 @@ def delete_facture(id):
 @app.route('/api/factures/patient/<string:id_patient>', methods=['GET'])
 def get_factures_by_patient(id_patient):
     """Get invoices for specific patient"""
-    factures = Facture.query.filter_by(id_patient=id_patient).all()
+    factures = factures_by_patient_query(id_patient).all()
     return jsonify([facture.to_dict() for facture in factures])
 
 @app.route('/api/rdv/today', methods=['GET'])
 def get_rdv_today():
     """Get today's appointments"""
-    from datetime import date
-    today = date.today().isoformat()
-    rdvs = RendezVous.query.filter(RendezVous.date_rdv == today).order_by(RendezVous.heure).all()
+    rdvs = rdv_of_day_query(date.today()).all()
     return jsonify([rdv.to_dict() for rdv in rdvs])
 
+@app.route('/api/rdv/upcoming', methods=['GET'])
+def get_upcoming_rdv():
+    """Get the next appointments (?limit=N, default 50; ?days=N to stop after N days)"""
+    now = datetime.now()
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    query = upcoming_rdv_query(now)
+    days = request.args.get('days', type=int)
+    if days:
+        query = query.filter(RendezVous.date_rdv <= now.date() + timedelta(days=days))
+    rdvs = query.limit(limit).all()
+    return jsonify([rdv.to_dict() for rdv in rdvs])
+
+@app.route('/api/rdv/slots', methods=['GET'])
+def get_free_slots():
+    """Next free slots of a doctor (?id_medecin=) or of a speciality (?speciality=)
+
+    ?date_from=YYYY-MM-DD (default today), ?days=N (default 7), ?duree=minutes, ?limit=N (default 10)
+    """
+    try:
+        first_day = parse_date(request.args['date_from']) if request.args.get('date_from') else date.today()
+        duree = parse_duree(request.args.get('duree'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    days = min(max(request.args.get('days', 7, type=int), 1), MAX_SLOT_WINDOW_DAYS)
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    
+    if request.args.get('id_medecin'):
+        doctors = {request.args['id_medecin']: None}
+    elif request.args.get('speciality'):
+        doctors = doctors_by_speciality(request.args['speciality'])
+        if doctors is None:
+            return jsonify({'error': 'Doctors-Service unavailable'}), 503
+    else:
+        return jsonify({'error': 'id_medecin or speciality required'}), 400
+    if not doctors:
+        return jsonify([])
+    
+    # One indexed query for the whole window, then an in-memory sweep
+    bookings = defaultdict(list)
+    last_day = first_day + timedelta(days=days - 1)
+    for r in doctor_window_query(list(doctors), first_day, last_day):
+        bookings[(r.id_medecin, r.date_rdv)].append((r.id_rdv, r.heure, r.duree))
+    agendas = {key: DayAgenda(items) for key, items in bookings.items()}
+    
+    slots = next_free_slots(agendas, sorted(doctors), first_day, days, duree, limit,
+                            WORKDAY_START_MIN, WORKDAY_END_MIN, SLOT_STEP)
+    return jsonify([{
+        'id_medecin': id_medecin,
+        'nom_medecin': doctors[id_medecin],
+        'date_rdv': day.isoformat(),
+        'heure': from_minutes(start).strftime('%H:%M'),
+        'duree': duree
+    } for day, start, id_medecin in slots])
+
 @app.route('/api/rdv/patient/<string:id_patient>/last', methods=['GET'])
 def get_last_rdv(id_patient):
     """Get last appointment for patient"""
-    rdv = RendezVous.query.filter_by(id_patient=id_patient)\
-                          .order_by(RendezVous.date_rdv.desc())\
-                          .first()
+    rdv = last_rdv_query(id_patient).first()
     if not rdv:
         return jsonify({"last_rdv": None})
     return jsonify(rdv.to_dict())
@@ -303,46 +671,40 @@ def get_stats():
     from datetime import datetime
     current_year = datetime.now().year
     
-    factures_payees = Facture.query.filter_by(statut='Payée').all()
+    mois_revenus = RevenuMensuel.query.all()
     
     revenu_current_year = 0
     monthly_revenue = {i: 0.0 for i in range(1, 13)}
     
-    for f in factures_payees:
-        if f.date_paiement and f.date_paiement.year == current_year:
-            revenu_current_year += f.montant
-            month = f.date_paiement.month
-            monthly_revenue[month] += f.montant
+    for r in mois_revenus:
+        if r.annee == current_year:
+            revenu_current_year += r.total
+            monthly_revenue[r.mois] += r.total
     
-    monthly_data = [monthly_revenue[i] for i in range(1, 13)]
+    monthly_data = [round(monthly_revenue[i], 2) for i in range(1, 13)]
     
     return jsonify({
         "revenu_total": round(revenu_current_year, 2),
         "annee_courante": current_year,
         "revenus_mensuels": monthly_data,
-        "total_factures": len(factures_payees)
+        "total_factures": sum(r.nb_factures for r in mois_revenus)
     })
 
 @app.route('/api/stats/historique', methods=['GET'])
 def get_stats_historique():
     """Get historical revenue statistics"""
-    factures_payees = Facture.query.filter_by(statut='Payée').all()
+    mois_revenus = RevenuMensuel.query.filter(RevenuMensuel.annee > 0).all()
     
     historique = {}
-    for f in factures_payees:
-        if not f.date_paiement:
-            continue
-        year = f.date_paiement.year
-        month = f.date_paiement.month
-        
-        if year not in historique:
-            historique[year] = {i: 0.0 for i in range(1, 13)}
+    for r in mois_revenus:
+        if r.annee not in historique:
+            historique[r.annee] = {i: 0.0 for i in range(1, 13)}
         
-        historique[year][month] += f.montant
+        historique[r.annee][r.mois] += r.total
     
     result = []
     for year, months in sorted(historique.items(), reverse=True):
-        monthly_list = [months[i] for i in range(1, 13)]
+        monthly_list = [round(months[i], 2) for i in range(1, 13)]
         total_year = sum(monthly_list)
         result.append({
             "annee": year,
@@ -352,6 +714,24 @@ def get_stats_historique():
     
     return jsonify(result)
 
+@app.route('/api/stats/analytics', methods=['GET'])
+def get_stats_analytics():
+    """Get invoice analytics: amount percentiles, reimbursement ratios, unpaid aging, top patients (?top=N)"""
+    top = min(max(request.args.get('top', 20, type=int), 1), 500)
+    today = date.today()
+    signature = tuple(factures_signature())
+    
+    columns = analytics_cache.get(signature, 'columns', lambda: load_factures(
+        db.session, Facture.__table__, ANALYTICS_CHUNK_SIZE))
+    result = analytics_cache.get(signature, (today, top), lambda: compute_analytics(columns, today, top))
+    
+    # Names only for the patients listed
+    ids = [p['id_patient'] for p in result['patients']]
+    noms = dict(db.session.query(Facture.id_patient, Facture.nom_patient)
+                .filter(Facture.id_patient.in_(ids)).distinct()) if ids else {}
+    return jsonify(dict(result, patients=[dict(p, nom_patient=noms.get(p['id_patient']))
+                                          for p in result['patients']]))
+
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """Get external service URLs"""
@@ -371,6 +751,28 @@ def health_check():
         'version': '1.0.0'
     })
 
+# ========================
+# CLI
+# ========================
+
+@app.cli.command('check-indexes')
+def check_indexes_command():
+    """Check with EXPLAIN QUERY PLAN that each hot query uses its index."""
+    results = check_query_plans(db.session, hot_query_checks())
+    if not results:
+        click.echo("Query plan check only runs on SQLite")
+        return
+    for name, ok, plan in results:
+        click.echo(f"{'OK  ' if ok else 'FAIL'} {name}: {' | '.join(plan)}")
+    if not all(ok for _, ok, _ in results):
+        raise SystemExit(1)
+
+@app.cli.command('rebuild-revenue')
+def rebuild_revenue_command():
+    """Recompute the monthly revenue rollup from the invoices."""
+    count = rebuild_revenue()
+    click.echo(f"Revenue rollup rebuilt: {count} months")
+
 # ========================
 # ERROR HANDLERS
 # ========================
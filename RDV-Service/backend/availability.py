@@ -0,0 +1,97 @@
+from bisect import bisect_left
+from itertools import islice
+from datetime import datetime, time, timedelta
+
+# Appointments with these statuses do not occupy their slot
+INACTIVE_STATUTS = ('Annulé', 'Annulée')
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def from_minutes(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+class DayAgenda:
+    """Booked intervals of one doctor on one day, in minutes since midnight.
+
+    Intervals are sorted by start; `_max_end[i]` is the latest end among the
+    first i+1 intervals, so a conflict lookup is a bisect plus a backward scan
+    that stops as soon as no earlier interval can reach the requested start.
+    """
+
+    def __init__(self, bookings=()):
+        # bookings: (id_rdv, start time, duree in minutes)
+        intervals = sorted((to_minutes(start), to_minutes(start) + duree, id_rdv)
+                           for id_rdv, start, duree in bookings)
+        self._starts = [i[0] for i in intervals]
+        self._intervals = intervals
+        self._max_end = []
+        latest = 0
+        for _, end, _ in intervals:
+            latest = max(latest, end)
+            self._max_end.append(latest)
+
+    def conflict(self, start, end, exclude_id=None):
+        """Id of a booking overlapping [start, end), or None."""
+        i = bisect_left(self._starts, end) - 1
+        while i >= 0 and self._max_end[i] > start:
+            booked_start, booked_end, id_rdv = self._intervals[i]
+            if booked_end > start and id_rdv != exclude_id:
+                return id_rdv
+            i -= 1
+        return None
+
+    def busy_blocks(self):
+        """Booked intervals merged into disjoint blocks."""
+        blocks = []
+        for start, end, _ in self._intervals:
+            if blocks and start <= blocks[-1][1]:
+                blocks[-1][1] = max(blocks[-1][1], end)
+            else:
+                blocks.append([start, end])
+        return blocks
+
+    def free_slots(self, day_start, day_end, duree, step, not_before=0):
+        """Start minutes of free slots of `duree` minutes, aligned on `step`."""
+        cursor = day_start
+        for block_start, block_end in self.busy_blocks() + [[day_end, day_end]]:
+            gap_start = max(cursor, not_before, day_start)
+            gap_end = min(block_start, day_end)
+            # Align on the slot grid that starts at day_start
+            t = day_start + -(-(gap_start - day_start) // step) * step
+            while t + duree <= gap_end:
+                yield t
+                t += step
+            cursor = max(cursor, block_end)
+            if cursor >= day_end:
+                return
+
+
+def next_free_slots(agendas, doctors, first_day, days, duree, limit,
+                    day_start, day_end, step, now=None):
+    """The `limit` earliest free slots across `doctors` over the window.
+
+    `agendas` maps (id_medecin, date) to a DayAgenda (missing = free day).
+    Returns (date, start minutes, id_medecin) tuples in chronological order.
+    """
+    now = now or datetime.now()
+    results = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        if day < now.date():
+            continue
+        not_before = to_minutes(now) + 1 if day == now.date() else 0
+        day_slots = []
+        for id_medecin in doctors:
+            agenda = agendas.get((id_medecin, day)) or DayAgenda()
+            slots = agenda.free_slots(day_start, day_end, duree, step, not_before)
+            day_slots.extend((start, id_medecin) for start in islice(slots, limit))
+        day_slots.sort()
+        for start, id_medecin in day_slots:
+            results.append((day, start, id_medecin))
+            if len(results) >= limit:
+                return results
+    return results
@@ -0,0 +1,168 @@
+import threading
+from datetime import date
+import numpy as np
+import sqlalchemy as sa
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+# Upper bounds (days since creation) of the outstanding balance buckets; the last one is open
+AGING_BOUNDS = (30, 60, 90)
+
+
+class FactureColumns:
+    """Invoice columns as NumPy arrays (one entry per invoice)."""
+
+    def __init__(self, id_patient, montant, remboursement, reste_a_payer, payee, date_creation):
+        self.id_patient = id_patient        # object (str)
+        self.montant = montant              # float64
+        self.remboursement = remboursement  # float64, NaN when missing
+        self.reste_a_payer = reste_a_payer  # float64
+        self.payee = payee                  # bool
+        self.date_creation = date_creation  # datetime64[D], NaT when missing
+
+    def __len__(self):
+        return len(self.montant)
+
+
+def load_factures(session, table, chunk_size=10000):
+    """Read the invoice table into FactureColumns, `chunk_size` rows at a time."""
+    stmt = sa.select(
+        table.c.id_patient, table.c.montant, table.c.remboursement,
+        table.c.reste_a_payer, table.c.statut, table.c.date_creation
+    ).execution_options(stream_results=True)
+    parts = [[] for _ in range(6)]
+    for rows in session.execute(stmt).partitions(chunk_size):
+        patients, montants, remboursements, restes, statuts, creations = zip(*rows)
+        parts[0].append(np.array(patients, dtype=object))
+        parts[1].append(np.array(montants, dtype=np.float64))
+        parts[2].append(np.array(remboursements, dtype=np.float64))
+        parts[3].append(np.array(restes, dtype=np.float64))
+        parts[4].append(np.array(statuts, dtype=object) == 'Payée')
+        parts[5].append(np.array(creations, dtype='datetime64[us]').astype('datetime64[D]'))
+    empty = (object, np.float64, np.float64, np.float64, bool, 'datetime64[D]')
+    return FactureColumns(*(
+        np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+        for chunks, dtype in zip(parts, empty)
+    ))
+
+
+def _round(value):
+    return round(float(value), 2)
+
+
+def amount_stats(cols):
+    montant = cols.montant[~np.isnan(cols.montant)]
+    if not len(montant):
+        return {'total': 0.0, 'moyenne': None, 'percentiles': {}}
+    values = np.percentile(montant, PERCENTILES)
+    return {
+        'total': _round(montant.sum()),
+        'moyenne': _round(montant.mean()),
+        'percentiles': {f'p{p}': _round(v) for p, v in zip(PERCENTILES, values)},
+    }
+
+
+def reimbursement_stats(cols):
+    mask = (cols.montant > 0) & ~np.isnan(cols.remboursement)
+    montant = cols.montant[mask]
+    remboursement = cols.remboursement[mask]
+    if not len(montant):
+        return {'taux_global': None, 'taux_moyen': None, 'taux_median': None,
+                'part_sans_remboursement': None, 'part_integrale': None}
+    ratio = remboursement / montant
+    return {
+        'taux_global': round(float(remboursement.sum() / montant.sum()), 4),
+        'taux_moyen': round(float(ratio.mean()), 4),
+        'taux_median': round(float(np.median(ratio)), 4),
+        'part_sans_remboursement': round(float((ratio == 0).mean()), 4),
+        'part_integrale': round(float((ratio >= 1).mean()), 4),
+    }
+
+
+def aging_stats(cols, today):
+    """Unpaid balances bucketed by invoice age in days."""
+    mask = ~cols.payee & (cols.reste_a_payer > 0) & ~np.isnat(cols.date_creation)
+    age = (np.datetime64(today, 'D') - cols.date_creation[mask]).astype(np.int64)
+    # Bucket i holds ages in (AGING_BOUNDS[i-1], AGING_BOUNDS[i]]
+    bucket = np.searchsorted(np.array(AGING_BOUNDS), age, side='left')
+    size = len(AGING_BOUNDS) + 1
+    counts = np.bincount(bucket, minlength=size)
+    amounts = np.bincount(bucket, weights=cols.reste_a_payer[mask], minlength=size)
+    labels = [f'0-{AGING_BOUNDS[0]}'] + [
+        f'{low + 1}-{high}' for low, high in zip(AGING_BOUNDS, AGING_BOUNDS[1:])
+    ] + [f'{AGING_BOUNDS[-1] + 1}+']
+    return {
+        'total': _round(amounts.sum()),
+        'nb_factures': int(counts.sum()),
+        'tranches': [
+            {'tranche': label, 'nb_factures': int(n), 'montant': _round(a)}
+            for label, n, a in zip(labels, counts, amounts)
+        ],
+    }
+
+
+def patient_totals(cols, top):
+    """The `top` patients by amount invoiced, with their totals per year."""
+    mask = ~np.isnan(cols.montant) & ~np.isnat(cols.date_creation)
+    if not mask.any():
+        return []
+    patients, index = np.unique(cols.id_patient[mask], return_inverse=True)
+    years = cols.date_creation[mask].astype('datetime64[Y]').astype(np.int64) + 1970
+    first_year = years.min()
+    nb_years = int(years.max() - first_year) + 1
+    montant = cols.montant[mask]
+
+    # (patient, year) matrix in one bincount
+    per_year = np.bincount(index * nb_years + (years - first_year), weights=montant,
+                           minlength=len(patients) * nb_years).reshape(len(patients), nb_years)
+    totals = per_year.sum(axis=1)
+    payes = np.bincount(index, weights=np.where(cols.payee[mask], montant, 0.0), minlength=len(patients))
+    restes = np.bincount(index, weights=np.nan_to_num(cols.reste_a_payer[mask]) * ~cols.payee[mask],
+                         minlength=len(patients))
+
+    best = np.argsort(-totals, kind='stable')[:top]
+    return [{
+        'id_patient': patients[i],
+        'total': _round(totals[i]),
+        'paye': _round(payes[i]),
+        'reste_a_payer': _round(restes[i]),
+        'annees': {int(first_year + y): _round(per_year[i, y]) for y in np.flatnonzero(per_year[i])},
+    } for i in best]
+
+
+def compute_analytics(cols, today=None, top=20):
+    today = today or date.today()
+    return {
+        'nb_factures': len(cols),
+        'nb_payees': int(cols.payee.sum()),
+        'montants': amount_stats(cols),
+        'remboursements': reimbursement_stats(cols),
+        'impayes': aging_stats(cols, today),
+        'patients': patient_totals(cols, top),
+        'date_calcul': today.isoformat(),
+    }
+
+
+class AnalyticsCache:
+    """Per-process cache of values computed from the invoices.
+
+    Entries are valid while the invoice signature (see the caller) is
+    unchanged; a new signature drops everything.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._signature = None
+        self._values = {}
+
+    def get(self, signature, key, compute):
+        with self._lock:
+            if signature != self._signature:
+                self._signature, self._values = signature, {}
+            if key in self._values:
+                return self._values[key]
+        value = compute()
+        with self._lock:
+            if signature == self._signature and len(self._values) < self.max_entries:
+                self._values[key] = value
+        return value
@@ -1,4 +1,11 @@
 import os
+import sys
+
+# Shared HTTP client (shared/http_client.py): copied to /opt/shared by the
+# Docker images (PYTHONPATH), taken straight from the repository locally
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared')
+if os.path.isdir(SHARED_DIR) and SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
 
 # Check if running in Docker
 USE_DOCKER = os.getenv('USE_DOCKER', 'false').lower() in ['true', '1', 'yes']
@@ -25,6 +32,16 @@ PORTS = {
 DATABASE_URI = os.getenv('DATABASE_URI', 'sqlite:///clinique.db')
 SECRET_KEY = os.getenv('SECRET_KEY', 'clinique2025')
 
+# Availability engine (free-slot search, double-booking checks)
+WORKDAY_START = os.getenv('WORKDAY_START', '08:00')
+WORKDAY_END = os.getenv('WORKDAY_END', '18:00')
+SLOT_STEP = int(os.getenv('SLOT_STEP', 15))
+DEFAULT_DUREE = int(os.getenv('DEFAULT_DUREE', 30))
+DOCTORS_CACHE_TTL = int(os.getenv('DOCTORS_CACHE_TTL', 300))
+
+# Billing analytics: invoices read per chunk
+ANALYTICS_CHUNK_SIZE = int(os.getenv('ANALYTICS_CHUNK_SIZE', 10000))
+
 # Print configuration for debugging
 print(f"🚀 RDV-Service Configuration:")
 print(f"  - USE_DOCKER: {USE_DOCKER}")
@@ -0,0 +1,47 @@
+"""add rdv and facture indexes
+
+Revision ID: 8b1e5d2c4a90
+Revises: 
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e5d2c4a90'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Tables are created by db.create_all(); this revision only adds the indexes
+# that create_all() does not add to tables that already exist.
+INDEXES = [
+    ('ix_rendez_vous_date_heure', 'rendez_vous', ['date_rdv', 'heure']),
+    ('ix_rendez_vous_patient_date', 'rendez_vous', ['id_patient', 'date_rdv']),
+    ('ix_rendez_vous_patient_statut', 'rendez_vous', ['id_patient', 'statut']),
+    ('ix_facture_patient', 'facture', ['id_patient']),
+    ('ix_facture_statut_paiement', 'facture', ['statut', 'date_paiement']),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        existing = _existing_indexes(table)
+        if existing is not None and name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        existing = _existing_indexes(table)
+        if existing and name in existing:
+            op.drop_index(name, table_name=table)
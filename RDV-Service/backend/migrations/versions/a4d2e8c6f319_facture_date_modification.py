@@ -0,0 +1,60 @@
+"""facture date_modification
+
+Revision ID: a4d2e8c6f319
+Revises: f3b9d1c7e248
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d2e8c6f319'
+down_revision = 'f3b9d1c7e248'
+branch_labels = None
+depends_on = None
+
+# Keeps MAX(date_modification) (invoice analytics signature) off a table scan
+INDEX = ('ix_facture_date_modification', 'facture', ['date_modification'])
+
+facture = sa.table(
+    'facture',
+    sa.column('date_creation', sa.DateTime),
+    sa.column('date_paiement', sa.DateTime),
+    sa.column('date_modification', sa.DateTime),
+)
+
+
+def _has_index(bind):
+    name, table, _ = INDEX
+    return name in {i['name'] for i in sa.inspect(bind).get_indexes(table)}
+
+
+def _has_column(bind):
+    inspector = sa.inspect(bind)
+    if not inspector.has_table('facture'):
+        return None
+    return 'date_modification' in {c['name'] for c in inspector.get_columns('facture')}
+
+
+def upgrade():
+    bind = op.get_bind()
+    if _has_column(bind) is False:
+        op.add_column('facture', sa.Column('date_modification', sa.DateTime(), nullable=True))
+        op.execute(facture.update().values(
+            date_modification=sa.func.coalesce(facture.c.date_paiement, facture.c.date_creation)
+        ))
+    if _has_column(bind) and not _has_index(bind):
+        name, table, columns = INDEX
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _has_column(bind) and _has_index(bind):
+        name, table, _ = INDEX
+        op.drop_index(name, table_name=table)
+    if _has_column(bind):
+        with op.batch_alter_table('facture') as batch_op:
+            batch_op.drop_column('date_modification')
@@ -0,0 +1,33 @@
+"""invoice counter per year
+
+Revision ID: b7e1f5a3c802
+Revises: a4d2e8c6f319
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e1f5a3c802'
+down_revision = 'a4d2e8c6f319'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() may already have created the table; counters are
+    # seeded from the existing numbers on first use of each year
+    if not sa.inspect(op.get_bind()).has_table('compteur_facture'):
+        op.create_table(
+            'compteur_facture',
+            sa.Column('annee', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('dernier_numero', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('annee'),
+        )
+
+
+def downgrade():
+    if sa.inspect(op.get_bind()).has_table('compteur_facture'):
+        op.drop_table('compteur_facture')
@@ -0,0 +1,103 @@
+"""typed date and time for rendez_vous
+
+Revision ID: d5a7e3b91c26
+Revises: 8b1e5d2c4a90
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a7e3b91c26'
+down_revision = '8b1e5d2c4a90'
+branch_labels = None
+depends_on = None
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d')
+TIME_FORMATS = ('%H:%M', '%H:%M:%S', '%H:%M:%S.%f', '%Hh%M')
+
+rendez_vous = sa.table(
+    'rendez_vous',
+    sa.column('id_rdv', sa.Integer),
+    sa.column('date_rdv', sa.Date),
+    sa.column('heure', sa.Time),
+)
+
+
+def _parse(value, formats):
+    for fmt in formats:
+        try:
+            return datetime.strptime(str(value).strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _is_typed(bind):
+    columns = {c['name']: c['type'] for c in sa.inspect(bind).get_columns('rendez_vous')}
+    return isinstance(columns['date_rdv'], sa.Date) and isinstance(columns['heure'], sa.Time)
+
+
+def _normalize_values(bind):
+    """Rewrite date/heure in the storage format of the typed columns
+    (SQLite keeps DATE as 'YYYY-MM-DD' and TIME as 'HH:MM:SS.ffffff').
+
+    Every row is checked before anything is written: an unreadable value
+    would break every read of the typed columns, so the upgrade stops and
+    lists the appointments to fix (both columns are NOT NULL).
+    """
+    rows = bind.execute(sa.text("SELECT id_rdv, date_rdv, heure FROM rendez_vous")).all()
+    parsed = [
+        (id_rdv, date_rdv, heure, _parse(date_rdv, DATE_FORMATS), _parse(heure, TIME_FORMATS))
+        for id_rdv, date_rdv, heure in rows
+    ]
+    bad = [
+        f"{id_rdv} ({date_rdv!r}, {heure!r})"
+        for id_rdv, date_rdv, heure, parsed_date, parsed_time in parsed
+        if parsed_date is None or parsed_time is None
+    ]
+    if bad:
+        raise RuntimeError(
+            f"{len(bad)} rendez_vous with an unreadable date_rdv/heure, fix them "
+            f"(YYYY-MM-DD, HH:MM) and rerun the upgrade: {', '.join(bad[:50])}"
+            + (" ..." if len(bad) > 50 else "")
+        )
+    for id_rdv, _, _, parsed_date, parsed_time in parsed:
+        bind.execute(
+            rendez_vous.update().where(rendez_vous.c.id_rdv == id_rdv)
+            .values(date_rdv=parsed_date.date(), heure=parsed_time.time())
+        )
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('rendez_vous'):
+        return
+    if bind.dialect.name == 'sqlite':
+        # Declared types are only affinities in SQLite, and a batch table copy
+        # would CAST the strings to numbers: only the stored values change.
+        _normalize_values(bind)
+        return
+    if _is_typed(bind):
+        return
+    _normalize_values(bind)
+    op.alter_column('rendez_vous', 'date_rdv', existing_type=sa.String(length=50), type_=sa.Date(),
+                    existing_nullable=False, postgresql_using='date_rdv::date')
+    op.alter_column('rendez_vous', 'heure', existing_type=sa.String(length=20), type_=sa.Time(),
+                    existing_nullable=False, postgresql_using='heure::time')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('rendez_vous'):
+        return
+    if bind.dialect.name != 'sqlite' and _is_typed(bind):
+        op.alter_column('rendez_vous', 'date_rdv', existing_type=sa.Date(), type_=sa.String(length=50),
+                        existing_nullable=False, postgresql_using='date_rdv::text')
+        op.alter_column('rendez_vous', 'heure', existing_type=sa.Time(), type_=sa.String(length=20),
+                        existing_nullable=False, postgresql_using='heure::text')
+    # Back to the 'HH:MM' wire format
+    bind.execute(sa.text("UPDATE rendez_vous SET heure = substr(heure, 1, 5)"))
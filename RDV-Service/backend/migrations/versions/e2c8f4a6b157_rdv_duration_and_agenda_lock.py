@@ -0,0 +1,50 @@
+"""rdv duration and agenda lock
+
+Revision ID: e2c8f4a6b157
+Revises: d5a7e3b91c26
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c8f4a6b157'
+down_revision = 'd5a7e3b91c26'
+branch_labels = None
+depends_on = None
+
+INDEX = ('ix_rendez_vous_medecin_date', 'rendez_vous', ['id_medecin', 'date_rdv', 'heure'])
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('rendez_vous'):
+        columns = {c['name'] for c in inspector.get_columns('rendez_vous')}
+        if 'duree' not in columns:
+            op.add_column('rendez_vous', sa.Column('duree', sa.Integer(), nullable=False, server_default='30'))
+        name, table, columns = INDEX
+        if name not in {i['name'] for i in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+    # db.create_all() may already have created the lock table
+    if not inspector.has_table('agenda_lock'):
+        op.create_table(
+            'agenda_lock',
+            sa.Column('id_medecin', sa.String(length=50), nullable=False),
+            sa.Column('date_rdv', sa.Date(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id_medecin', 'date_rdv'),
+        )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('agenda_lock'):
+        op.drop_table('agenda_lock')
+    name, table, _ = INDEX
+    if name in {i['name'] for i in inspector.get_indexes(table)}:
+        op.drop_index(name, table_name=table)
+    if 'duree' in {c['name'] for c in inspector.get_columns(table)}:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('duree')
@@ -0,0 +1,68 @@
+"""monthly revenue rollup
+
+Revision ID: f3b9d1c7e248
+Revises: e2c8f4a6b157
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d1c7e248'
+down_revision = 'e2c8f4a6b157'
+branch_labels = None
+depends_on = None
+
+facture = sa.table(
+    'facture',
+    sa.column('montant', sa.Float),
+    sa.column('statut', sa.String),
+    sa.column('date_paiement', sa.DateTime),
+)
+
+revenu_mensuel = sa.table(
+    'revenu_mensuel',
+    sa.column('annee', sa.Integer),
+    sa.column('mois', sa.Integer),
+    sa.column('total', sa.Float),
+    sa.column('nb_factures', sa.Integer),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # db.create_all() may already have created the (empty) table
+    if not inspector.has_table('revenu_mensuel'):
+        op.create_table(
+            'revenu_mensuel',
+            sa.Column('annee', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('mois', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('total', sa.Float(), nullable=False),
+            sa.Column('nb_factures', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('annee', 'mois'),
+        )
+    if not inspector.has_table('facture'):
+        return
+    if bind.execute(sa.select(sa.func.count()).select_from(revenu_mensuel)).scalar():
+        return
+
+    annee = sa.func.coalesce(sa.extract('year', facture.c.date_paiement), 0)
+    mois = sa.func.coalesce(sa.extract('month', facture.c.date_paiement), 0)
+    rows = bind.execute(
+        sa.select(annee, mois, sa.func.sum(facture.c.montant), sa.func.count())
+        .where(facture.c.statut == 'Payée')
+        .group_by(annee, mois)
+    ).all()
+    if rows:
+        op.bulk_insert(revenu_mensuel, [
+            {'annee': int(a), 'mois': int(m), 'total': total or 0.0, 'nb_factures': count}
+            for a, m, total, count in rows
+        ])
+
+
+def downgrade():
+    if sa.inspect(op.get_bind()).has_table('revenu_mensuel'):
+        op.drop_table('revenu_mensuel')
@@ -0,0 +1,24 @@
+def explain(session, query):
+    """SQLite query plan of an ORM query, one detail line per step."""
+    statement = query.statement if hasattr(query, 'statement') else query
+    compiled = statement.compile(dialect=session.get_bind().dialect,
+                                 compile_kwargs={'literal_binds': True})
+    rows = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+    return [row[-1] for row in rows]
+
+
+def check_query_plans(session, checks):
+    """Verify each query uses its expected index.
+
+    `checks` maps a name to (query, index name). Returns a list of
+    (name, ok, plan lines); the check is skipped (empty list) on databases
+    other than SQLite.
+    """
+    if session.get_bind().dialect.name != 'sqlite':
+        return []
+    results = []
+    for name, (query, index) in checks.items():
+        plan = explain(session, query)
+        ok = any(f"INDEX {index}" in line for line in plan)
+        results.append((name, ok, plan))
+    return results
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope='session')
+def rdv_app(tmp_path_factory):
+    """The app module, bound to a scratch SQLite database."""
+    workdir = tmp_path_factory.mktemp('rdv-service')
+    os.environ['DATABASE_URI'] = f"sqlite:///{workdir / 'clinique.db'}"
+    import app as rdv_app
+    rdv_app.app.config['TESTING'] = True
+    return rdv_app
+
+
+@pytest.fixture
+def client(rdv_app):
+    return rdv_app.app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def clean_tables(rdv_app):
+    yield
+    with rdv_app.app.app_context():
+        for table in reversed(rdv_app.db.metadata.sorted_tables):
+            rdv_app.db.session.execute(table.delete())
+        rdv_app.db.session.commit()
@@ -0,0 +1,52 @@
+from datetime import date, time
+
+
+def add_rdv(rdv_app, heure, statut='Confirmé', day=date(2024, 3, 4), id_medecin='1'):
+    with rdv_app.app.app_context():
+        rdv = rdv_app.RendezVous(id_patient='PT1', nom_patient='Test', id_medecin=id_medecin,
+                                 date_rdv=day, heure=heure, duree=30, statut=statut)
+        rdv_app.db.session.add(rdv)
+        rdv_app.db.session.commit()
+        return rdv.id_rdv
+
+
+def test_status_change_ignores_legacy_overlap(rdv_app, client):
+    # Double booking created before the overlap check existed
+    first = add_rdv(rdv_app, time(9, 0))
+    add_rdv(rdv_app, time(9, 15))
+
+    response = client.put(f'/api/rdv/{first}', json={'statut': 'Terminé'})
+
+    assert response.status_code == 200
+    assert response.get_json()['statut'] == 'Terminé'
+
+
+def test_unchanged_slot_fields_do_not_trigger_the_check(rdv_app, client):
+    first = add_rdv(rdv_app, time(9, 0))
+    add_rdv(rdv_app, time(9, 15))
+
+    response = client.put(f'/api/rdv/{first}', json={
+        'date_rdv': '2024-03-04', 'heure': '09:00', 'duree': 30, 'id_medecin': '1', 'motif': 'Contrôle'
+    })
+
+    assert response.status_code == 200
+
+
+def test_moving_onto_a_booking_is_rejected(rdv_app, client):
+    first = add_rdv(rdv_app, time(9, 0), day=date(2099, 3, 4))
+    other = add_rdv(rdv_app, time(10, 0), day=date(2099, 3, 4))
+
+    response = client.put(f'/api/rdv/{first}', json={'heure': '10:15'})
+
+    assert response.status_code == 409
+    assert response.get_json()['conflict_id'] == other
+
+
+def test_reactivating_a_cancelled_rdv_is_checked(rdv_app, client):
+    cancelled = add_rdv(rdv_app, time(9, 0), statut='Annulé')
+    other = add_rdv(rdv_app, time(9, 0))
+
+    response = client.put(f'/api/rdv/{cancelled}', json={'statut': 'Confirmé'})
+
+    assert response.status_code == 409
+    assert response.get_json()['conflict_id'] == other
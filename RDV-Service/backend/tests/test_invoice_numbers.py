@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+
+WORKERS = 8
+PER_WORKER = 25
+
+
+def test_concurrent_invoices_get_unique_contiguous_numbers(rdv_app):
+    with rdv_app.app.app_context():
+        rdv_app.db.session.add(rdv_app.RendezVous(
+            id_patient='PT1', nom_patient='Test', id_medecin='1',
+            date_rdv=date(2024, 3, 4), heure=time(9, 0), statut='Terminé'
+        ))
+        rdv_app.db.session.commit()
+
+    def create(_):
+        with rdv_app.app.test_client() as client:
+            return [
+                client.post('/api/factures', json={'id_patient': 'PT1', 'nom_patient': 'Test', 'montant': 10})
+                for _ in range(PER_WORKER)
+            ]
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        responses = [r for batch in executor.map(create, range(WORKERS)) for r in batch]
+
+    assert [r.status_code for r in responses] == [201] * WORKERS * PER_WORKER
+    annee = datetime.utcnow().year
+    numeros = sorted(r.get_json()['numero_facture'] for r in responses)
+    assert numeros == [rdv_app.numero_facture_format(annee, n) for n in range(1, WORKERS * PER_WORKER + 1)]
+
+
+def test_numbering_continues_after_legacy_invoices(rdv_app, client):
+    annee = datetime.utcnow().year
+    with rdv_app.app.app_context():
+        rdv_app.db.session.add(rdv_app.RendezVous(
+            id_patient='PT1', nom_patient='Test', id_medecin='1',
+            date_rdv=date(2024, 3, 4), heure=time(9, 0)
+        ))
+        # Numbered before the per-year counter existed
+        rdv_app.db.session.add(rdv_app.Facture(
+            numero_facture=rdv_app.numero_facture_format(annee, 41), id_patient='PT1',
+            nom_patient='Test', montant=10, remboursement=0, reste_a_payer=10, statut='En attente'
+        ))
+        rdv_app.db.session.commit()
+
+    response = client.post('/api/factures', json={'id_patient': 'PT1', 'nom_patient': 'Test', 'montant': 10})
+
+    assert response.status_code == 201
+    assert response.get_json()['numero_facture'] == rdv_app.numero_facture_format(annee, 42)
@@ -117,6 +117,7 @@ export const externalAPI = {
       
       const response = await axios.get(url, { 
         timeout: 5000,
+        params: { all: true },
         headers: {
           'Accept': 'application/json'
         }
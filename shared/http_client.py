@@ -0,0 +1,137 @@
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# ===================================================
+# Client HTTP partagé pour les appels entre microservices
+# (copié dans /opt/shared par chaque image Docker, voir config.py des services)
+# ===================================================
+
+# Timeouts par défaut : (connexion, lecture) en secondes
+DEFAULT_TIMEOUT = (2, 5)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Levée sans appel réseau quand le disjoncteur d'un service est ouvert."""
+
+
+class CircuitBreaker:
+    """Disjoncteur simple : fermé → ouvert après N échecs consécutifs,
+    puis semi-ouvert après `reset_timeout` (une seule requête d'essai)."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class ServiceClient:
+    """Sessions keep-alive par service amont, timeouts par défaut et disjoncteurs.
+
+    Les erreurs restent des `requests.exceptions.RequestException`, donc les
+    `except` existants des appelants continuent de fonctionner.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_maxsize=20,
+                 failure_threshold=5, reset_timeout=30):
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._sessions = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def _upstream(self, url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _get_session(self, upstream):
+        with self._lock:
+            session = self._sessions.get(upstream)
+            if session is None:
+                session = requests.Session()
+                # Appels internes : pas de proxy système
+                session.trust_env = False
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[upstream] = session
+                self._breakers[upstream] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return session, self._breakers[upstream]
+
+    def request(self, method, url, **kwargs):
+        upstream = self._upstream(url)
+        session, breaker = self._get_session(upstream)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Service {upstream} indisponible (circuit ouvert)")
+
+        kwargs.setdefault('timeout', self.timeout)
+        try:
+            response = session.request(method, url, **kwargs)
+        except BaseException:
+            # Quelle que soit l'exception, l'essai semi-ouvert doit être libéré
+            breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def breaker_states(self):
+        """État des disjoncteurs par service amont (pour le diagnostic)."""
+        with self._lock:
+            return {upstream: breaker.state for upstream, breaker in self._breakers.items()}
+
+
+# Client unique du processus
+service_client = ServiceClient()
@@ -0,0 +1,52 @@
+import pytest
+import requests
+
+from http_client import CircuitOpenError, ServiceClient
+
+URL = 'http://upstream.test/api/x'
+
+
+class FakeResponse:
+    status_code = 200
+
+
+def open_breaker(client, monkeypatch):
+    """Trip the breaker of the upstream, then let it go half-open."""
+    session, breaker = client._get_session(client._upstream(URL))
+
+    def refuse(*args, **kwargs):
+        raise requests.exceptions.ConnectionError('refused')
+
+    monkeypatch.setattr(session, 'request', refuse)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get(URL)
+    assert breaker.state == 'half-open'  # reset_timeout=0
+    return session, breaker
+
+
+def test_unexpected_error_releases_the_half_open_probe(monkeypatch):
+    client = ServiceClient(failure_threshold=1, reset_timeout=0)
+    session, breaker = open_breaker(client, monkeypatch)
+
+    def broken(*args, **kwargs):
+        raise ValueError('not a RequestException')
+
+    monkeypatch.setattr(session, 'request', broken)
+    with pytest.raises(ValueError):
+        client.get(URL)
+    assert not breaker._probing
+
+    # The next probe goes through and closes the breaker
+    monkeypatch.setattr(session, 'request', lambda *args, **kwargs: FakeResponse())
+    assert client.get(URL).status_code == 200
+    assert breaker.state == 'closed'
+
+
+def test_open_breaker_rejects_without_calling(monkeypatch):
+    client = ServiceClient(failure_threshold=1, reset_timeout=60)
+    session, breaker = client._get_session(client._upstream(URL))
+    breaker.record_failure()
+    monkeypatch.setattr(session, 'request', lambda *args, **kwargs: pytest.fail('called'))
+
+    with pytest.raises(CircuitOpenError):
+        client.get(URL)